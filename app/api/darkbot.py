@@ -1,11 +1,14 @@
+import asyncio
 from fastapi import APIRouter, BackgroundTasks, HTTPException, status
 
 from app.core.bots.factories.bot_factory import BotFactory
 from app.models.bot import BotStartRequest
 from app.models.upload import UploadStartRequest
 
-from app.workers.tasks import start_bot_instances
-from app.workers.tasks import start_upload_instances
+from app.utils import validate_config_instances
+from app.workers.batches import batch_tracker
+from app.workers.tasks import send_bot_instances
+from app.workers.tasks import send_upload_instances
 
 import logging
 
@@ -13,27 +16,46 @@ router = APIRouter(prefix="/darkbot")
 
 logger = logging.getLogger('uvicorn.error')
 
+def validate_request(config: dict, instances: int):
+    try:
+        validate_config_instances(config, instances)
+    except ValueError as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"type": "invalid_config", "msg": str(e)}
+        )
+
 @router.post("/create/{bot_type}")
 async def start_bot(
     bot_type: str,
     request: BotStartRequest,
     background_tasks: BackgroundTasks
 ):
+    validate_request(request.config, request.instances)
+
     try:
         logger.info("Starting video creation...")
 
+        BotFactory.create(bot_type, request.config)
+        batch_id = batch_tracker.new_id()
+        # Registered before responding, so the batch can be polled right away
+        await asyncio.to_thread(batch_tracker.create, batch_id, "bot", request.instances)
+
         background_tasks.add_task(
-            start_bot_instances.send,
+            send_bot_instances,
             bot_type=bot_type,
             config=request.config,
-            instances=request.instances
+            instances=request.instances,
+            batch_id=batch_id
         )
 
         return {
             "status": "queued",
             "message": "Instances queued for processing",
             "bot_type": bot_type,
-            "instances": request.instances
+            "instances": request.instances,
+            "batch_id": batch_id
         }
 
     except ValueError as e:
@@ -59,19 +81,25 @@ async def start_upload(
     request: UploadStartRequest,
     background_tasks: BackgroundTasks
 ):
+    validate_request(request.config, request.instances)
+
     try:
         logger.info("Starting video upload...")
+        batch_id = batch_tracker.new_id()
+        await asyncio.to_thread(batch_tracker.create, batch_id, "upload", request.instances)
 
         background_tasks.add_task(
-            start_upload_instances.send,
+            send_upload_instances,
             config=request.config,
-            instances=request.instances
+            instances=request.instances,
+            batch_id=batch_id
         )
 
         return {
             "status": "queued",
             "message": "Instances queued for processing",
-            "instances": request.instances
+            "instances": request.instances,
+            "batch_id": batch_id
         }
 
     except Exception as e:
@@ -80,3 +108,27 @@ async def start_upload(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail={"type": "server_error", "msg": str(e)}
         )
+
+@router.get("/batches/{batch_id}")
+def get_batch(batch_id: str):
+    if not batch_tracker.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"type": "batches_disabled", "msg": "Batch tracking needs REDIS_URL"}
+        )
+
+    try:
+        batch = batch_tracker.status(batch_id)
+    except Exception as e:
+        logger.critical(f"Unexpected error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"type": "server_error", "msg": str(e)}
+        )
+
+    if batch is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"type": "unknown_batch", "msg": f"Batch {batch_id} not found"}
+        )
+    return batch
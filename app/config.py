@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 from pathlib import Path
 
 class Settings(BaseSettings):
@@ -14,12 +14,61 @@ class Settings(BaseSettings):
     RABBITMQ_PASS: str
     BOT_QUEUE_NAME: str
     UPLOAD_QUEUE_NAME: str
+    SCRAPE_QUEUE_NAME: str = "scrape"
+    RENDER_QUEUE_NAME: str = "render"
+    PIPELINE_MODE: str = "combined"
+    REDIS_URL: Optional[str] = None
+    BATCH_TTL: int = 7 * 24 * 60 * 60
+
+    WORKSPACE_BACKEND: str = "disk"
+    WORKSPACE_DIR: Optional[str] = None
+    WORKSPACE_MAX_AGE: int = 24 * 60 * 60
+
+    VIDEO_MANIFEST_PATH: Optional[str] = None
+    UPLOAD_CLAIM_TIMEOUT: int = 2 * 60 * 60
+
+    UPLOAD_CHUNK_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_MAX_RETRIES: int = 5
+    UPLOAD_RETRY_BACKOFF: float = 1.0
+    UPLOAD_MAX_CONCURRENCY: int = 6
+    UPLOAD_PLATFORM_LIMITS: Dict[str, int] = {"tiktok": 2, "youtube": 3, "instagram": 2}
+    TIKTOK_UPLOAD_URL: Optional[str] = None
+    YOUTUBE_UPLOAD_URL: Optional[str] = None
+    INSTAGRAM_UPLOAD_URL: Optional[str] = None
     PRIORITY: int
     MAX_RETRIES: int
     MAX_CONCURRENT_INSTANCES: int
 
+    RENDER_MODE: str = "single"
+    RENDER_BACKEND: str = "moviepy"
+    WORKER_PROCESSES: int = 1
+    RENDER_WORKERS: Optional[int] = None
+    RENDER_THREADS: Optional[int] = None
+    RENDER_FRAME_QUEUE: int = 8
+    RENDER_PROFILE: str = "default"
+    RENDER_ACCOUNT_PROFILES: Dict[str, str] = {}
+    LABEL_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 10
+    HTTP_DNS_CACHE_TTL: int = 300
+    HTTP_KEEPALIVE_TIMEOUT: float = 30
+    HTTP_TIMEOUT: float = 120
+    HTTP_CONNECT_TIMEOUT: float = 10
+
     DEEPSEEK_API_URL: Optional[str]
     DEEPSEEK_API_KEY: Optional[str]
+    DEEPSEEK_STREAM: bool = True
+
+    CHOICE_BANK_PATH: Optional[str] = None
+    CHOICE_BANK_BATCH: int = 50
+    CHOICE_BANK_LOW_WATER: int = 20
+    CHOICE_BANK_SIMILARITY: float = 0.85
+
+    PREFETCH_DIR: Optional[str] = None
+    PREFETCH_DEPTH: int = 2
+    PREFETCH_THEME_DEPTHS: Dict[str, int] = {}
+    PREFETCH_MAX_AGE: int = 6 * 60 * 60
 
     GOOGLE_PROJECT_TYPE: Optional[str]
     GOOGLE_PROJECT_ID: Optional[str]
@@ -28,6 +77,9 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_EMAIL: Optional[str]
     GOOGLE_CLIENT_ID: Optional[str]
     GOOGLE_TOKEN_URI: Optional[str]
+    TTS_MAX_CONCURRENCY: int = 10
+    TTS_CACHE_DIR: Optional[str] = None
+    TTS_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
 
     FLICKR_API_URL: Optional[str]
     FLICKR_API_KEY: Optional[str]
@@ -35,6 +87,11 @@ class Settings(BaseSettings):
     SERPER_API_KEY: Optional[str]
     SERPER_API_URL: Optional[str]
 
+    IMAGE_CACHE_DIR: Optional[str] = None
+    IMAGE_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+    IMAGE_SEARCH_TTL: int = 24 * 60 * 60
+    IMAGE_MAX_BYTES: int = 15 * 1024 * 1024
+
     TIKTOK_API_KEY: Optional[str]
 
     class Config:
@@ -1,3 +1,4 @@
+from .http import *
 from .deepseek import *
 from .google import *
 from .tiktok import *
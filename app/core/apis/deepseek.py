@@ -1,40 +1,180 @@
-import aiohttp
 import logging
 import json
+import re
+from typing import Any, AsyncIterator, List
 from app.config import settings
+from app.core.apis.http import HttpClient
 
 logger = logging.getLogger('uvicorn.error')
 
+class JsonArrayStream:
+    """
+    Incremental parser that pulls the elements of one JSON array out of text
+    arriving in pieces. Each element is returned as soon as it closes, without
+    waiting for the rest of the document.
+    """
+
+    def __init__(self, key: str):
+        self._key = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._item_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.closed = False
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        Add a piece of text.
+        Returns:
+            Elements of the array completed by this piece, in order
+        """
+        self._buffer += text
+        items = []
+
+        if not self._in_array:
+            match = self._key.search(self._buffer)
+            if not match:
+                return items
+            self._in_array = True
+            self._pos = match.end()
+
+        buffer = self._buffer
+        while self._pos < len(buffer) and not self.closed:
+            char = buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                if self._item_start is None:
+                    self._item_start = self._pos
+                self._in_string = True
+            elif char in "{[":
+                if self._item_start is None:
+                    self._item_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # End of the array itself
+                    items.extend(self._flush(self._pos))
+                    self.closed = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        items.extend(self._flush(self._pos + 1))
+            elif char == "," and self._depth == 0:
+                items.extend(self._flush(self._pos))
+            elif self._item_start is None and not char.isspace():
+                self._item_start = self._pos
+
+            self._pos += 1
+
+        # Drop what has been consumed so the buffer stays small
+        offset = self._pos if self._item_start is None else self._item_start
+        self._buffer = buffer[offset:]
+        self._pos -= offset
+        if self._item_start is not None:
+            self._item_start -= offset
+        return items
+
+    def _flush(self, end: int) -> List[Any]:
+        if self._item_start is None:
+            return []
+        raw = self._buffer[self._item_start:end].strip()
+        self._item_start = None
+        return [json.loads(raw)] if raw else []
+
 class DeepSeek:
-    @staticmethod
-    async def execute(content):
-        logger.info("Starting DeepSeek request")
+    MODEL = "deepseek/deepseek-chat:free"
 
-        headers = {
+    @staticmethod
+    def _headers():
+        return {
             'Authorization': f'Bearer {settings.DEEPSEEK_API_KEY}',
             'Content-Type': 'application/json'
         }
 
+    @staticmethod
+    async def execute(content):
+        logger.info("Starting DeepSeek request")
+
         data = {
-            "model": "deepseek/deepseek-chat:free",
+            "model": DeepSeek.MODEL,
             "messages": [{"role": "user", "content": content}]
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    settings.DEEPSEEK_API_URL,
-                    json=data,
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return json.loads(result.get("choices", [{}])[0].get("message", {}).get("content", ""))
-                    else:
-                        response_text = await response.text()
-                        raise Exception(
-                            f"DeepSeek API Error: {response.status} - {response_text}"
-                        )
+            session = HttpClient.session()
+            async with session.post(
+                settings.DEEPSEEK_API_URL,
+                json=data,
+                headers=DeepSeek._headers()
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    return json.loads(result.get("choices", [{}])[0].get("message", {}).get("content", ""))
+                else:
+                    response_text = await response.text()
+                    raise Exception(
+                        f"DeepSeek API Error: {response.status} - {response_text}"
+                    )
         except Exception as e:
             logger.error(f"Error in DeepSeek: {str(e)}")
             raise e
+
+    @staticmethod
+    async def stream(content, array_key) -> AsyncIterator[Any]:
+        """
+        Stream a completion and yield the elements of its `array_key` JSON
+        array one by one, each as soon as the model has finished writing it.
+        """
+        logger.info("Starting DeepSeek streaming request")
+
+        data = {
+            "model": DeepSeek.MODEL,
+            "messages": [{"role": "user", "content": content}],
+            "stream": True
+        }
+
+        parser = JsonArrayStream(array_key)
+        session = HttpClient.session()
+        async with session.post(
+            settings.DEEPSEEK_API_URL,
+            json=data,
+            headers=DeepSeek._headers()
+        ) as response:
+            if response.status != 200:
+                response_text = await response.text()
+                raise Exception(
+                    f"DeepSeek API Error: {response.status} - {response_text}"
+                )
+
+            async for line in response.content:
+                line = line.decode("utf-8").strip()
+                # Blank lines separate events, ":" lines are keep-alive comments
+                if not line.startswith("data:"):
+                    continue
+
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+
+                event = json.loads(payload)
+                if "error" in event:
+                    raise Exception(f"DeepSeek API Error: {event['error']}")
+
+                for choice in event.get("choices", []):
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        for item in parser.feed(delta):
+                            yield item
+
+        if not parser.closed:
+            raise Exception(f"DeepSeek stream ended before the '{array_key}' array was complete")
@@ -1,42 +1,127 @@
+import aiofiles
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from google.oauth2 import service_account
 import google.cloud.texttospeech as tts
 import logging
 from app.config import settings
+from app.core.cache import tts_cache
 
 logger = logging.getLogger('uvicorn.error')
 
 class Google:
-    @staticmethod
-    async def text_to_speech(content, filename):
-        try:
-            text_input = tts.SynthesisInput(text=content)
-            voice_params = tts.VoiceSelectionParams(
-                language_code="en-US", name="en-US-Chirp3-HD-Orus"
-            )
-            audio_config = tts.AudioConfig(audio_encoding=tts.AudioEncoding.LINEAR16)
-
-            credentials = service_account.Credentials.from_service_account_info({
-                "type": settings.GOOGLE_PROJECT_TYPE,
-                "project_id": settings.GOOGLE_PROJECT_ID,
-                "private_key_id": settings.GOOGLE_PRIVATE_KEY_ID,
-                "private_key": settings.GOOGLE_PRIVATE_KEY.replace('\\n', '\n'),
-                "client_email": settings.GOOGLE_CLIENT_EMAIL,
-                "client_id": settings.GOOGLE_CLIENT_ID,
-                "token_uri": settings.GOOGLE_TOKEN_URI,
-            })
-
-            client = tts.TextToSpeechClient(credentials=credentials)
-            response = client.synthesize_speech(
+    LANGUAGE_CODE = "en-US"
+    VOICE_NAME = "en-US-Chirp3-HD-Orus"
+    AUDIO_ENCODING = tts.AudioEncoding.LINEAR16
+
+    # One client (gRPC channel + credentials) and one bounded thread pool per
+    # worker process. The sync client is thread-safe and, unlike the asyncio
+    # client, not tied to the event loop of the message that created it.
+    _client = None
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_client(cls) -> tts.TextToSpeechClient:
+        with cls._lock:
+            if cls._client is None:
+                credentials = service_account.Credentials.from_service_account_info({
+                    "type": settings.GOOGLE_PROJECT_TYPE,
+                    "project_id": settings.GOOGLE_PROJECT_ID,
+                    "private_key_id": settings.GOOGLE_PRIVATE_KEY_ID,
+                    "private_key": settings.GOOGLE_PRIVATE_KEY.replace('\\n', '\n'),
+                    "client_email": settings.GOOGLE_CLIENT_EMAIL,
+                    "client_id": settings.GOOGLE_CLIENT_ID,
+                    "token_uri": settings.GOOGLE_TOKEN_URI,
+                })
+                cls._client = tts.TextToSpeechClient(credentials=credentials)
+                logger.info("Google TTS client created")
+            return cls._client
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        with cls._lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(
+                    max_workers=settings.TTS_MAX_CONCURRENCY,
+                    thread_name_prefix="google-tts"
+                )
+            return cls._executor
+
+    @classmethod
+    def _cache_key(cls, content) -> str:
+        return tts_cache.key(content, cls.VOICE_NAME, cls.LANGUAGE_CODE, cls.AUDIO_ENCODING.name)
+
+    @classmethod
+    async def _synthesize(cls, content, cache_key) -> bytes:
+        text_input = tts.SynthesisInput(text=content)
+        voice_params = tts.VoiceSelectionParams(
+            language_code=cls.LANGUAGE_CODE, name=cls.VOICE_NAME
+        )
+        audio_config = tts.AudioConfig(audio_encoding=cls.AUDIO_ENCODING)
+
+        # The blocking gRPC call runs on the bounded pool, so gathered
+        # requests actually overlap
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            cls._get_executor(),
+            partial(
+                cls._get_client().synthesize_speech,
                 input=text_input,
                 voice=voice_params,
                 audio_config=audio_config,
             )
+        )
 
-            full_path = f"{settings.AUDIOS_TMP_DIR}{filename}"
-            with open(full_path, "wb") as out:
-                out.write(response.audio_content)
+        # Writing, and evicting once over the cap, would stall the event loop
+        await asyncio.to_thread(tts_cache.put, cache_key, response.audio_content)
+        logger.debug(f"TTS cache: {tts_cache.stats()}")
+        return response.audio_content
+
+    @classmethod
+    async def speech_data(cls, content) -> bytes:
+        """Synthesized LINEAR16 WAV bytes, without writing a file."""
+        try:
+            cache_key = cls._cache_key(content)
+            cached = tts_cache.read(cache_key)
+            if cached is not None:
+                logger.info("Using cached speech")
+                return cached
+            return await cls._synthesize(content, cache_key)
+        except Exception as e:
+            logger.error(f"Error in Google.speech_data: {str(e)}")
+            raise e
+
+    @classmethod
+    async def text_to_speech(cls, content, filename, directory=None):
+        try:
+            full_path = os.path.join(directory, filename) if directory else f"{settings.AUDIOS_TMP_DIR}{filename}"
+            cache_key = cls._cache_key(content)
+
+            if tts_cache.materialize(cache_key, full_path):
+                logger.info(f"Cached speech linked to {full_path}")
+                logger.debug(f"TTS cache: {tts_cache.stats()}")
+                return full_path
+
+            audio_content = await cls._synthesize(content, cache_key)
+
+            async with aiofiles.open(full_path, "wb") as out:
+                await out.write(audio_content)
                 logger.info(f"Generated speech saved to {full_path}")
                 return full_path
         except Exception as e:
             logger.error(f"Error in Google.text_to_speech: {str(e)}")
             raise e
+
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
+            if cls._client is not None:
+                cls._client.transport.close()
+                cls._client = None
@@ -0,0 +1,64 @@
+import aiohttp
+import asyncio
+import logging
+import threading
+from app.config import settings
+
+logger = logging.getLogger('uvicorn.error')
+
+class HttpClient:
+    """
+    Registry of pooled aiohttp sessions shared by every API wrapper.
+    Sessions are bound to an event loop, so there is one per loop; workers keep
+    a long-lived loop per thread (see app.workers.loop), which lets keep-alive
+    connections and cached DNS lookups survive from one message to the next.
+    """
+
+    _sessions = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _create_session() -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_MAX_CONNECTIONS,
+            limit_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=settings.HTTP_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    @classmethod
+    def session(cls) -> aiohttp.ClientSession:
+        """Get the pooled session of the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+
+        with cls._lock:
+            # Forget sessions of loops that were closed without calling close()
+            for stale in [l for l in cls._sessions if l.is_closed()]:
+                del cls._sessions[stale]
+
+            session = cls._sessions.get(loop)
+            if session is None or session.closed:
+                session = cls._create_session()
+                cls._sessions[loop] = session
+                logger.info("HTTP client session created")
+            return session
+
+    @classmethod
+    async def open(cls):
+        cls.session()
+
+    @classmethod
+    async def close(cls):
+        """Close the session of the running event loop, if any."""
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            session = cls._sessions.pop(loop, None)
+
+        if session is not None and not session.closed:
+            await session.close()
+            logger.info("HTTP client session closed")
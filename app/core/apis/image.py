@@ -1,18 +1,149 @@
 import aiofiles
-import aiohttp
+import asyncio
+import io
+import json
 import logging
+import os
 import random
+import time
+from functools import partial
+from PIL import Image as PILImage
 from app.config import settings
+from app.core.apis.http import HttpClient
+from app.core.cache import image_cache, image_search_cache
+from app.core.render.images import has_alpha
 
 logger = logging.getLogger('uvicorn.error')
 
 class Image:
+    # Images are stored pre-sized to the height ChoicesEditingStrategy renders them at
+    TARGET_HEIGHT = 600
+    JPEG_QUALITY = 92
+
     @staticmethod
-    async def get_image(query, filename):
-        try:
-            logger.info("Starting Image.get_image request")
+    async def _search(provider, query, fetch):
+        """
+        Return image candidates for a query, from the search cache while fresh.
+        `fetch` is awaited on a miss and must return a list of image URLs.
+        """
+        key = image_search_cache.key(provider, query)
+
+        cached = image_search_cache.read(key)
+        if cached:
+            payload = json.loads(cached)
+            if time.time() - payload["fetched_at"] < settings.IMAGE_SEARCH_TTL:
+                logger.info(f"Using cached {provider} results for '{query}'")
+                return payload["candidates"]
+
+        candidates = await fetch()
+        if candidates:
+            payload = json.dumps({"fetched_at": time.time(), "candidates": candidates})
+            await asyncio.to_thread(image_search_cache.put, key, payload.encode("utf-8"))
+        return candidates
+
+    @staticmethod
+    def _prepare(data):
+        """
+        Decode an image and downscale it to the render height, off the event loop.
+        Returns compact JPEG bytes (PNG when the image has transparency).
+        """
+        with PILImage.open(io.BytesIO(data)) as img:
+            width = max(1, round(img.width * Image.TARGET_HEIGHT / img.height))
+            # Let the JPEG decoder skip detail we'd throw away anyway
+            img.draft("RGB", (width * 2, Image.TARGET_HEIGHT * 2))
+
+            transparent = has_alpha(img)
+            img = img.convert("RGBA" if transparent else "RGB")
+            if img.height != Image.TARGET_HEIGHT:
+                width = max(1, round(img.width * Image.TARGET_HEIGHT / img.height))
+                img = img.resize((width, Image.TARGET_HEIGHT), PILImage.Resampling.LANCZOS)
+
+            out = io.BytesIO()
+            if transparent:
+                img.save(out, format="PNG", optimize=True)
+            else:
+                img.save(out, format="JPEG", quality=Image.JPEG_QUALITY)
+            return out.getvalue()
+
+    @staticmethod
+    async def _fetch_bytes(image_url):
+        """Stream an image download, enforcing the content type and byte cap."""
+        async with HttpClient.session().get(image_url) as img_response:
+            if not img_response.ok:
+                raise Exception(f"Got {img_response.status} downloading {image_url}")
+
+            content_type = img_response.headers.get("Content-Type", "")
+            if not content_type.startswith("image/"):
+                raise Exception(f"Unexpected content type '{content_type}' for {image_url}")
+
+            if (img_response.content_length or 0) > settings.IMAGE_MAX_BYTES:
+                raise Exception(f"Image too large ({img_response.content_length} bytes): {image_url}")
+
+            buffer = bytearray()
+            async for chunk in img_response.content.iter_chunked(64 * 1024):
+                buffer.extend(chunk)
+                if len(buffer) > settings.IMAGE_MAX_BYTES:
+                    raise Exception(f"Image exceeds {settings.IMAGE_MAX_BYTES} bytes: {image_url}")
+            return bytes(buffer)
+
+    @staticmethod
+    async def _fetch_prepared(image_url, key):
+        data = await Image._fetch_bytes(image_url)
+        data = await asyncio.to_thread(Image._prepare, data)
+        await asyncio.to_thread(image_cache.put, key, data)
+        return data
+
+    @staticmethod
+    def _pick(image_urls):
+        """A random candidate, preferring ones already in the image cache so the download is skipped."""
+        cached = [url for url in image_urls if image_cache.contains(image_cache.key(url, Image.TARGET_HEIGHT))]
+        return random.choice(cached or image_urls)
+
+    @staticmethod
+    async def _load(image_url):
+        """Prepared image bytes for a URL, from the image cache when possible."""
+        key = image_cache.key(image_url, Image.TARGET_HEIGHT)
+
+        cached = image_cache.read(key)
+        if cached is not None:
+            logger.info(f"Using cached image for {image_url}")
+            return cached
+        return await Image._fetch_prepared(image_url, key)
+
+    @staticmethod
+    async def _download(image_url, full_path):
+        key = image_cache.key(image_url, Image.TARGET_HEIGHT)
 
-            full_path = f"{settings.IMG_TMP_DIR}{filename}"
+        if image_cache.materialize(key, full_path):
+            logger.info(f"Cached image linked to {full_path}")
+            logger.debug(f"Image cache: {image_cache.stats()}")
+            return full_path
+
+        data = await Image._fetch_prepared(image_url, key)
+        async with aiofiles.open(full_path, "wb") as f:
+            await f.write(data)
+
+        logger.info(f"Image saved to {full_path}")
+        return full_path
+
+    @staticmethod
+    async def get_image(query, filename, directory=None):
+        full_path = os.path.join(directory, filename) if directory else f"{settings.IMG_TMP_DIR}{filename}"
+        return await Image.search_image(query, partial(Image._download, full_path=full_path))
+
+    @staticmethod
+    async def get_image_data(query):
+        """Prepared image bytes for a query, without writing a file."""
+        return await Image.search_image(query, Image._load)
+
+    @staticmethod
+    async def search_image(query, deliver):
+        """
+        Find an image for a query and hand its URL to `deliver`, which returns
+        the result (a saved path or the bytes). Serper first, Flickr as fallback.
+        """
+        try:
+            logger.info("Starting Image.search_image request")
 
             headers = {
                 "X-API-KEY": settings.SERPER_API_KEY,
@@ -25,7 +156,9 @@ class Image:
                 "tbm": "isch"
             }
 
-            async with aiohttp.ClientSession() as session:
+            session = HttpClient.session()
+
+            async def fetch():
                 async with session.post(
                     settings.SERPER_API_URL,
                     headers=headers,
@@ -34,39 +167,35 @@ class Image:
                     if not response.ok:
                         logger.error(f"Got {response.status} error from serper: {response.reason}")
                         raise
-                    
+
                     data = await response.json()
 
                 if not data.get("images"):
                     logger.warning("No images found")
                     raise
-                
-                valid_images = [img for img in data["images"] if img.get("imageWidth", 0) > 300 and img.get("imageHeight", 0) > 300]
-                
-                if not valid_images:
-                    logger.warning("No valid images found")
-                    raise
 
-                selected_image = random.choice(valid_images)
-                image_url = selected_image["imageUrl"]
+                return [
+                    img["imageUrl"] for img in data["images"]
+                    if img.get("imageWidth", 0) > 300 and img.get("imageHeight", 0) > 300
+                ]
 
-                async with session.get(image_url) as img_response:
-                    async with aiofiles.open(full_path, "wb") as f:
-                        await f.write(await img_response.read())
+            valid_images = await Image._search("serper", query, fetch)
 
-                    logger.info(f"Image saved to {full_path}")
-                    return full_path
+            if not valid_images:
+                logger.warning("No valid images found")
+                raise
+
+            image_url = Image._pick(valid_images)
+            return await deliver(image_url)
 
         except Exception as e:
-            logger.error(f"Error in Image.get_image: {str(e)}")
-            return await Image.get_image2(query, filename)
+            logger.error(f"Error in Image.search_image: {str(e)}")
+            return await Image.search_image2(query, deliver)
 
     @staticmethod
-    async def get_image2(query, filename):
+    async def search_image2(query, deliver):
         try:
-            logger.info("Starting Image.get_image2 request")
-
-            full_path = f"{settings.IMG_TMP_DIR}{filename}"
+            logger.info("Starting Image.search_image2 request")
 
             params = {
                 "method": "flickr.photos.search",
@@ -84,26 +213,26 @@ class Image:
                 "extras": "url_o"
             }
 
-            async with aiohttp.ClientSession() as session:
+            session = HttpClient.session()
+
+            async def fetch():
                 async with session.get(settings.FLICKR_API_URL, params=params) as response:
                     data = await response.json()
 
-                    if data["stat"] != "ok" or not data["photos"]["photo"]:
-                        logger.warning("No images found")
-                        return None
+                if data["stat"] != "ok" or not data["photos"]["photo"]:
+                    return []
 
-                    photo = data["photos"]["photo"][0]
-                    image_url = photo['url_o']
+                return [photo["url_o"] for photo in data["photos"]["photo"] if photo.get("url_o")]
 
-                    async with session.get(image_url) as img_response:
-                        async with aiofiles.open(full_path, "wb") as f:
-                            await f.write(await img_response.read())
+            candidates = await Image._search("flickr", query, fetch)
 
-                        logger.info(f"Image saved to {full_path}")
-                        return full_path
+            if not candidates:
+                logger.warning("No images found")
+                return None
 
-            return None
+            # Most relevant result, as Flickr sorts by relevance
+            return await deliver(candidates[0])
 
         except Exception as e:
-            logger.error(f"Error in Image.get_image2: {str(e)}")
+            logger.error(f"Error in Image.search_image2: {str(e)}")
             raise e
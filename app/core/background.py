@@ -0,0 +1,38 @@
+import asyncio
+import concurrent.futures
+import threading
+
+_background_lock = threading.Lock()
+_background_loop = None
+
+def _background() -> asyncio.AbstractEventLoop:
+    global _background_loop
+    with _background_lock:
+        if _background_loop is None or _background_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="background-loop", daemon=True).start()
+            _background_loop = loop
+        return _background_loop
+
+def run_in_background(coro) -> concurrent.futures.Future:
+    """
+    Schedule a coroutine on a shared daemon thread's event loop and return at once.
+    Worker thread loops only run while a message is being processed, so work
+    that should outlive the current message (cache refills) belongs here.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _background())
+
+def close_background_loop(cleanup=None, timeout: float = 10):
+    """Stop the background loop, awaiting `cleanup()` on it first if given."""
+    global _background_loop
+    with _background_lock:
+        loop, _background_loop = _background_loop, None
+    if loop is None or loop.is_closed():
+        return
+
+    if cleanup is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(cleanup(), loop).result(timeout)
+        except Exception:
+            pass
+    loop.call_soon_threadsafe(loop.stop)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 import logging
+from app.core.bots.processing import Workspace
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -13,6 +14,16 @@ class BotInstanceBase(ABC):
     async def run_pipeline(self):
         pass
 
+    @abstractmethod
+    async def scrape(self, workspace: Workspace) -> Dict[str, Any]:
+        """First pipeline stage; returns the content manifest handed to render()."""
+        pass
+
+    @abstractmethod
+    async def render(self, content: Dict[str, Any]) -> str:
+        """Second pipeline stage; returns the path of the rendered video."""
+        pass
+
 class BotFactoryBase(ABC):
     @abstractmethod
     def create_instance(self, instance_number: int) -> BotInstanceBase:
@@ -0,0 +1,244 @@
+import asyncio
+import difflib
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, List, Optional
+from app.config import settings
+from app.core.background import run_in_background
+
+logger = logging.getLogger('uvicorn.error')
+
+Generator = Callable[[str, int], Awaitable[List[dict]]]
+
+class ChoiceBank:
+    """
+    Persistent per-theme bank of generated choices, shared by every worker on
+    the host through SQLite. Choices are generated in bulk, near-duplicates are
+    dropped on insert, and each account draws choices without replacement, so
+    most videos never wait on the LLM. When fewer than `low_water` unused
+    choices are left for an account, a refill runs in the background.
+    """
+
+    # A background refill holds its theme for at most this long
+    REFILL_LEASE = 300
+
+    def __init__(self, path: Optional[str], batch_size: int, low_water: int, similarity: float):
+        self.path = path
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self.similarity = similarity
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+
+        with self._init_lock:
+            if not self._initialized:
+                connection.executescript("""
+                    CREATE TABLE IF NOT EXISTS choices (
+                        id INTEGER PRIMARY KEY,
+                        theme TEXT NOT NULL,
+                        fingerprint TEXT NOT NULL,
+                        normalized TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        UNIQUE (theme, fingerprint)
+                    );
+                    CREATE TABLE IF NOT EXISTS draws (
+                        account TEXT NOT NULL,
+                        choice_id INTEGER NOT NULL REFERENCES choices (id),
+                        drawn_at REAL NOT NULL,
+                        PRIMARY KEY (account, choice_id)
+                    );
+                    CREATE TABLE IF NOT EXISTS refills (
+                        theme TEXT PRIMARY KEY,
+                        expires_at REAL NOT NULL
+                    );
+                """)
+                self._initialized = True
+        return connection
+
+    @staticmethod
+    def _normalize(choice: dict) -> str:
+        """Comparable form of a choice: lowercase option texts without punctuation, in either order."""
+        texts = []
+        for option_key in ['option_1', 'option_2']:
+            text = re.sub(r"[^\w\s]", " ", choice[option_key]['text'].lower())
+            texts.append(" ".join(text.split()))
+        return " | ".join(sorted(texts))
+
+    @staticmethod
+    def _is_valid(choice) -> bool:
+        try:
+            return all(
+                choice[option_key]['text'] and choice[option_key]['image_keywords']
+                for option_key in ['option_1', 'option_2']
+            )
+        except (KeyError, TypeError):
+            return False
+
+    def _is_near_duplicate(self, normalized: str, existing: List[str]) -> bool:
+        for other in existing:
+            matcher = difflib.SequenceMatcher(None, normalized, other)
+            if (matcher.real_quick_ratio() >= self.similarity
+                    and matcher.quick_ratio() >= self.similarity
+                    and matcher.ratio() >= self.similarity):
+                return True
+        return False
+
+    def add(self, theme: str, choices: List[dict]) -> int:
+        """
+        Store new choices for a theme, skipping invalid and near-duplicate ones.
+        Returns:
+            Number of choices added
+        """
+        connection = self._connection()
+        existing = [row[0] for row in connection.execute(
+            "SELECT normalized FROM choices WHERE theme = ?", (theme,)
+        )]
+
+        rows = []
+        for choice in choices:
+            if not self._is_valid(choice):
+                continue
+            normalized = self._normalize(choice)
+            if self._is_near_duplicate(normalized, existing):
+                continue
+            existing.append(normalized)
+            rows.append((
+                theme,
+                hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
+                normalized,
+                json.dumps(choice),
+                time.time()
+            ))
+
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO choices (theme, fingerprint, normalized, data, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        logger.info(f"Choice bank: added {len(rows)} of {len(choices)} generated choices for '{theme}'")
+        return len(rows)
+
+    def _draw(self, theme: str, account: str, count: int):
+        """Claim up to `count` random choices the account hasn't used; returns ((id, choice) pairs, unused left)."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            rows = connection.execute(
+                "SELECT id, data FROM choices WHERE theme = ? AND id NOT IN "
+                "(SELECT choice_id FROM draws WHERE account = ?) ORDER BY RANDOM() LIMIT ?",
+                (theme, account, count)
+            ).fetchall()
+            now = time.time()
+            connection.executemany(
+                "INSERT INTO draws (account, choice_id, drawn_at) VALUES (?, ?, ?)",
+                [(account, row[0], now) for row in rows]
+            )
+            left = connection.execute(
+                "SELECT COUNT(*) FROM choices WHERE theme = ? AND id NOT IN "
+                "(SELECT choice_id FROM draws WHERE account = ?)",
+                (theme, account)
+            ).fetchone()[0]
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return [(row[0], json.loads(row[1])) for row in rows], left
+
+    def _undraw(self, account: str, choice_ids: List[int]):
+        """Give claimed choices back, so the account can still get them later."""
+        with self._connection() as connection:
+            connection.executemany(
+                "DELETE FROM draws WHERE account = ? AND choice_id = ?",
+                [(account, choice_id) for choice_id in choice_ids]
+            )
+
+    def _lease(self, theme: str) -> bool:
+        """Take the theme's refill lease unless another worker holds it."""
+        connection = self._connection()
+        now = time.time()
+        with connection:
+            cursor = connection.execute(
+                "INSERT INTO refills (theme, expires_at) VALUES (?, ?) "
+                "ON CONFLICT (theme) DO UPDATE SET expires_at = excluded.expires_at "
+                "WHERE refills.expires_at < ?",
+                (theme, now + self.REFILL_LEASE, now)
+            )
+        return cursor.rowcount > 0
+
+    def _release(self, theme: str):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM refills WHERE theme = ?", (theme,))
+
+    async def refill(self, theme: str, generate: Generator) -> int:
+        choices = await generate(theme, self.batch_size)
+        return await asyncio.to_thread(self.add, theme, choices)
+
+    async def _background_refill(self, theme: str, generate: Generator):
+        try:
+            await self.refill(theme, generate)
+        except Exception as e:
+            logger.error(f"Choice bank refill for '{theme}' failed: {str(e)}")
+        finally:
+            await asyncio.to_thread(self._release, theme)
+
+    async def take(self, theme: str, account: str, count: int, generate: Generator) -> List[dict]:
+        """
+        Draw choices for an account, refilling the theme first when it has run dry.
+        Args:
+            theme: Theme the choices are about
+            account: Account the video is for; it never gets the same choice twice
+            count: Number of choices wanted
+            generate: Coroutine function (theme, count) returning fresh choices
+        Returns:
+            Exactly `count` choices, or none if even a refill couldn't supply that
+            many, so the caller gets them elsewhere instead of making a short video
+        """
+        drawn, left = await asyncio.to_thread(self._draw, theme, account, count)
+
+        if len(drawn) < count:
+            logger.info(f"Choice bank for '{theme}' is short for {account}, refilling")
+            await self.refill(theme, generate)
+            more, left = await asyncio.to_thread(self._draw, theme, account, count - len(drawn))
+            drawn += more
+
+        if left < self.low_water and await asyncio.to_thread(self._lease, theme):
+            logger.info(f"Choice bank for '{theme}' is low ({left} left for {account}), refilling in background")
+            run_in_background(self._background_refill(theme, generate))
+
+        if len(drawn) < count:
+            logger.warning(f"Choice bank for '{theme}' has only {len(drawn)} of {count} choices for {account}")
+            await asyncio.to_thread(self._undraw, account, [choice_id for choice_id, _ in drawn])
+            return []
+
+        return [choice for _, choice in drawn]
+
+choice_bank = ChoiceBank(
+    settings.CHOICE_BANK_PATH,
+    settings.CHOICE_BANK_BATCH,
+    settings.CHOICE_BANK_LOW_WATER,
+    settings.CHOICE_BANK_SIMILARITY
+)
@@ -1,8 +1,10 @@
 from app.core.bots.base.bot import BotFactoryBase, BotInstanceBase
 from app.core.bots.processing import ( 
     Scraper, 
-    Editor
+    Editor,
+    Workspace
 )
+from app.config import settings
 import logging
 from .strategies import (
     ChoicesScrapingStrategy,
@@ -37,14 +39,39 @@ class ChoicesBotInstance(BotInstanceBase):
         self.editor = Editor(strategies["editing"])
         logger.info("Bot instance created")
 
+    @property
+    def instance_config(self) -> dict:
+        return self.config["instances"][self.instance_number]
+
+    async def scrape(self, workspace: Workspace) -> dict:
+        return await self.scraper.execute(self.instance_config, workspace)
+
+    async def render(self, content: dict) -> str:
+        return await self.editor.execute(
+            self.instance_config.get("account", ""),
+            content,
+            self.instance_config.get("render")
+        )
+
+    async def render_stream(self, workspace: Workspace) -> str:
+        """Scrape and render at once: each choice is rendered as soon as it is scraped."""
+        return await self.editor.execute_stream(
+            self.instance_config.get("account", ""),
+            self.scraper.stream(self.instance_config, workspace),
+            self.instance_config.get("render")
+        )
+
     async def run_pipeline(self):
         try:
             logger.info("Starting pipeline")
-            instance_config = self.config["instances"][self.instance_number]
-            account = instance_config.get("account", "")
 
-            content = await self.scraper.execute(instance_config)
-            video = await self.editor.execute(account, content)
+            # Scraped media lives in the run's own workspace, removed even if the run fails
+            with Workspace(f"choices_{self.instance_number}") as workspace:
+                if settings.PIPELINE_MODE == "pipelined":
+                    video = await self.render_stream(workspace)
+                else:
+                    content = await self.scrape(workspace)
+                    video = await self.render(content)
 
             logger.info("Pipeline completed successfully")
             return {"status": "success", "message": video}
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+from app.config import settings
+from app.core.bots.processing import Workspace
+from app.core.background import run_in_background
+
+logger = logging.getLogger('uvicorn.error')
+
+Scrape = Callable[[str, Workspace, str], Awaitable[Dict]]
+
+class ContentPool:
+    """
+    Pool of fully scraped content (choices with their images and speech) kept
+    ready per theme and account, so a job can skip scraping and go straight to
+    editing. Entries are scraped for the account that will get them, so the
+    choice bank's draws are recorded against it and an account never gets a
+    choice twice.
+    Each entry is a directory holding content.json and its media files; it is
+    built under `.staging` and published with a rename, and claimed with
+    another rename, so concurrent workers never share an entry. Whenever a
+    theme is requested the pool is topped back up to its depth in the
+    background; entries older than `max_age` are discarded.
+    """
+
+    # A prefetch in flight holds its slot for at most this long, so one that
+    # died with its worker doesn't block refills for long
+    PREFETCH_LEASE = 300
+
+    def __init__(self, directory: Optional[str], depth: int, theme_depths: Dict[str, int], max_age: float):
+        self.directory = directory
+        self.depth = depth
+        self.theme_depths = theme_depths
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    def depth_for(self, theme: str) -> int:
+        return self.theme_depths.get(theme, self.depth)
+
+    @staticmethod
+    def _theme_key(theme: str, account: str) -> str:
+        return hashlib.sha256(json.dumps([theme, account]).encode("utf-8")).hexdigest()[:16]
+
+    def _theme_dir(self, theme: str, account: str) -> str:
+        return os.path.join(self.directory, self._theme_key(theme, account))
+
+    def _entries(self, theme: str, account: str):
+        """Fresh entries of a theme for an account, oldest first; expired ones are removed on the way."""
+        theme_dir = self._theme_dir(theme, account)
+        try:
+            names = sorted(os.listdir(theme_dir))
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for name in names:
+            path = os.path.join(theme_dir, name)
+            created_at = float(name.split("_", 1)[0])
+            if time.time() - created_at > self.max_age:
+                logger.info(f"Discarding stale prefetched content {path}")
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                entries.append(path)
+        return entries
+
+    @staticmethod
+    def _media(content: Dict):
+        """(option, field) pairs of every media file referenced by the content."""
+        for choice in content['choices']:
+            for option_key in ['option_1', 'option_2']:
+                option = choice[option_key]
+                for field in ['image_path', 'audio_path']:
+                    if option.get(field):
+                        yield option, field
+
+    def _new_staging(self) -> str:
+        staging = os.path.join(self.directory, ".staging", f"{time.time():.6f}_{uuid.uuid4().hex[:8]}")
+        os.makedirs(staging)
+        return staging
+
+    def put(self, theme: str, account: str, content: Dict, staging: Optional[str] = None) -> str:
+        """
+        Move scraped content and its media files into the pool.
+        Args:
+            theme: Theme the content was scraped for
+            account: Account the content was scraped for
+            content: Scraped content with media paths
+            staging: Staging directory the media may already be in
+        Returns:
+            Path of the published entry
+        """
+        staging = staging or self._new_staging()
+        entry_id = os.path.basename(staging)
+
+        # Media paths are stored as names relative to the entry
+        for option, field in self._media(content):
+            name = os.path.basename(option[field])
+            shutil.move(option[field], os.path.join(staging, name))
+            option[field] = name
+        with open(os.path.join(staging, "content.json"), "w") as f:
+            json.dump({"theme": theme, "account": account, "content": content}, f)
+
+        os.makedirs(self._theme_dir(theme, account), exist_ok=True)
+        entry = os.path.join(self._theme_dir(theme, account), entry_id)
+        os.rename(staging, entry)
+        return entry
+
+    def claim(self, theme: str, account: str, directory: Optional[str] = None) -> Optional[Dict]:
+        """
+        Take the oldest ready entry of a theme for an account, moving its media into `directory`
+        (the job's workspace) or, without one, into the tmp dirs.
+        Returns:
+            The content, or None if the pool has nothing fresh for the theme
+        """
+        claimed_dir = os.path.join(self.directory, ".claimed")
+        os.makedirs(claimed_dir, exist_ok=True)
+        if directory:
+            tmp_dirs = {'image_path': f"{directory}/", 'audio_path': f"{directory}/"}
+        else:
+            tmp_dirs = {'image_path': settings.IMG_TMP_DIR, 'audio_path': settings.AUDIOS_TMP_DIR}
+
+        for entry in self._entries(theme, account):
+            claimed = os.path.join(claimed_dir, os.path.basename(entry))
+            try:
+                os.rename(entry, claimed)
+            except FileNotFoundError:
+                # Another worker got there first
+                continue
+
+            try:
+                with open(os.path.join(claimed, "content.json")) as f:
+                    content = json.load(f)["content"]
+                for option, field in self._media(content):
+                    target = f"{tmp_dirs[field]}{option[field]}"
+                    shutil.move(os.path.join(claimed, option[field]), target)
+                    option[field] = target
+            finally:
+                shutil.rmtree(claimed, ignore_errors=True)
+
+            logger.info(f"Claimed prefetched content for '{theme}' ({account})")
+            return content
+        return None
+
+    def _pending(self, theme: str, account: str):
+        """Leases of prefetches in flight for a theme and account, across every worker on the host."""
+        pending_dir = os.path.join(self.directory, ".pending")
+        prefix = f"{self._theme_key(theme, account)}_"
+        try:
+            names = [name for name in os.listdir(pending_dir) if name.startswith(prefix)]
+        except FileNotFoundError:
+            return []
+
+        markers = []
+        for name in names:
+            path = os.path.join(pending_dir, name)
+            try:
+                # An expired lease belongs to a worker that died mid-prefetch
+                if time.time() - os.path.getmtime(path) > self.PREFETCH_LEASE:
+                    os.remove(path)
+                else:
+                    markers.append(path)
+            except FileNotFoundError:
+                pass
+        return markers
+
+    def replenish(self, theme: str, account: str, scrape: Scrape):
+        """Start background scrapes until the ready and pending entries of a theme and account reach its depth."""
+        with self._lock:
+            missing = (
+                self.depth_for(theme)
+                - len(self._entries(theme, account))
+                - len(self._pending(theme, account))
+            )
+            for _ in range(max(0, missing)):
+                marker = os.path.join(self.directory, ".pending", f"{self._theme_key(theme, account)}_{uuid.uuid4().hex}")
+                os.makedirs(os.path.dirname(marker), exist_ok=True)
+                open(marker, "w").close()
+                run_in_background(self._prefetch(theme, account, scrape, marker))
+
+    async def _prefetch(self, theme: str, account: str, scrape: Scrape, marker: str):
+        staging = None
+        try:
+            # Media is scraped straight into the staging directory
+            staging = await asyncio.to_thread(self._new_staging)
+            content = await scrape(theme, Workspace.attach(staging), account)
+            entry = await asyncio.to_thread(self.put, theme, account, content, staging)
+            logger.info(f"Prefetched content for '{theme}' ({account}) into {entry}")
+        except Exception as e:
+            logger.error(f"Prefetch for '{theme}' ({account}) failed: {str(e)}")
+            if staging:
+                shutil.rmtree(staging, ignore_errors=True)
+        finally:
+            try:
+                os.remove(marker)
+            except FileNotFoundError:
+                pass
+
+content_pool = ContentPool(
+    settings.PREFETCH_DIR,
+    settings.PREFETCH_DEPTH,
+    settings.PREFETCH_THEME_DEPTHS,
+    settings.PREFETCH_MAX_AGE
+)
@@ -1,21 +1,39 @@
 from abc import ABC
+import asyncio
+import io
 import logging
 import os
+import tempfile
 import time
-from typing import Dict, Tuple
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 from app.config import settings
-
-from moviepy import (
-    ImageClip,
-    AudioFileClip,
-    TextClip,
-    concatenate_videoclips,
-    concatenate_audioclips,
-    CompositeVideoClip,
-    CompositeAudioClip,
+from app.core.cache import asset_cache, label_cache
+from app.core.manifest import video_manifest
+from app.core.render import (
+    AUDIO_FPS,
+    AudioCue,
+    AudioTrack,
+    EncoderProfile,
+    carry_over,
+    Layer,
+    TimelineClip,
+    concat_segments,
+    decode_audio,
+    duration_of,
+    encoder_profile,
+    has_alpha,
+    mixdown,
+    render_executor,
+    render_filtergraph,
+    stream_segments,
+    to_audio_clip,
 )
-from moviepy.video.fx import Resize, CrossFadeIn
-from moviepy.audio.fx.MultiplyVolume import MultiplyVolume
+
+import numpy as np
+from PIL import Image as PILImage
+from moviepy import ImageClip
+from moviepy.video.fx import Resize
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -27,10 +45,17 @@ class ChoicesEditingStrategy(ABC):
 
     # Video configuration
     VIDEO_DIMENSIONS = (1080, 1920)  # (width, height) in pixels
+    IMAGE_HEIGHT = 600  # Option images height in pixels
     OUTPUT_FPS = 24
-    OUTPUT_CODEC = "libx264"
     AUDIO_CODEC = "aac"
-    PROCESSING_THREADS = 6
+    BG_MUSIC_VOLUME = 0.1
+
+    # Render backends: moviepy's compositor, or one native ffmpeg filtergraph
+    RENDER_BACKENDS = ("moviepy", "ffmpeg")
+
+    # Segmented rendering: lossless-concat friendly intermediates
+    SEGMENT_EXTENSION = "mkv"
+    SEGMENT_AUDIO_CODEC = "pcm_s16le"
 
     # Text styling
     TEXT_STYLE = {
@@ -84,163 +109,164 @@ class ChoicesEditingStrategy(ABC):
         'text2_y': 0.6   # Bottom text vertical position
     }
 
-    async def _load_assets(self) -> Dict:
+    def _load_assets(self) -> Dict:
         """
         Load all shared assets needed for video editing.
+        Decoding happens once per worker through the asset cache; every call
+        only hands out read-only views of the cached frame and PCM.
         Returns:
-            Dictionary containing preloaded assets (background, audio clips, etc.)
+            Dictionary containing preloaded assets (background frame, PCM arrays)
         """
-        width, height = self.VIDEO_DIMENSIONS
-
         return {
-            'bg_image': (
-                ImageClip(self.ASSET_PATHS['background'])
-                .with_effects([Resize(height=height, width=width)])
-            ),
-            'bg_music': AudioFileClip(self.ASSET_PATHS['bg_music']),
-            'or_sound': AudioFileClip(self.ASSET_PATHS['or_sound']),
-            'tic_tac': AudioFileClip(self.ASSET_PATHS['tic_tac']),
-            'notify': AudioFileClip(self.ASSET_PATHS['notify']),
-            'swipe': AudioFileClip(self.ASSET_PATHS['swipe'])
+            'bg_image': asset_cache.image(self.ASSET_PATHS['background'], self.VIDEO_DIMENSIONS),
+            'bg_music': asset_cache.audio(self.ASSET_PATHS['bg_music']),
+            'or_sound': asset_cache.audio(self.ASSET_PATHS['or_sound']),
+            'tic_tac': asset_cache.audio(self.ASSET_PATHS['tic_tac']),
+            'notify': asset_cache.audio(self.ASSET_PATHS['notify']),
+            'swipe': asset_cache.audio(self.ASSET_PATHS['swipe'])
         }
 
-    def _create_image_clip(self, path: str) -> ImageClip:
+    def _create_image_clip(self, source: Union[str, bytes]) -> ImageClip:
         """
         Create a standardized ImageClip with consistent settings.
+        Scraped images normally arrive pre-sized, in which case no resize runs.
         Args:
-            path: File path to the image
+            source: File path to the image, or its encoded bytes
         Returns:
             ImageClip with standardized size and settings
         """
-        return ImageClip(path).with_effects([Resize(height=600)])
+        with PILImage.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+            clip = ImageClip(np.array(img.convert("RGBA" if has_alpha(img) else "RGB")))
 
-    def _create_text_clip(self, text: str, stroke_color: str) -> TextClip:
+        if clip.size[1] != self.IMAGE_HEIGHT:
+            clip = clip.with_effects([Resize(height=self.IMAGE_HEIGHT)])
+        return clip
+
+    @staticmethod
+    def _media(option: Dict, kind: str) -> Union[str, bytes]:
+        """An option's image or audio: in-memory bytes when the scraper kept them, else the file path."""
+        return option.get(f'{kind}_data') or option[f'{kind}_path']
+
+    def _create_label_clip(self, style: Dict) -> ImageClip:
         """
-        Create a standardized TextClip with consistent styling.
+        Create a text label from the label cache instead of re-rasterizing it.
         Args:
-            text: The text to display
-            stroke_color: Color for text outline
+            style: Keyword arguments for TextClip
         Returns:
-            TextClip with standardized styling
+            ImageClip with the label's mask, equivalent to TextClip(**style)
         """
-        style = {
+        rgb, mask = label_cache.get(style)
+        return ImageClip(rgb).with_mask(ImageClip(mask, is_mask=True))
+
+    def _text_style(self, text: str, stroke_color: str) -> Dict:
+        return {
             'font': self.ASSET_PATHS['sparky'],
             'text': text,
             'stroke_color': stroke_color,
             **self.TEXT_STYLE
         }
-        return TextClip(**style)
 
-    def _create_percent_clip(self, percent: int, is_winner: bool) -> TextClip:
-        """
-        Create a percentage display TextClip with win/lose styling.
-        Args:
-            percent: The percentage value to display
-            is_winner: Whether this option won
-        Returns:
-            Styled TextClip showing the percentage
-        """
-        style = {
+    def _percent_style(self, percent: int, is_winner: bool) -> Dict:
+        return {
             'font': self.ASSET_PATHS['sparky'],
             'text': f"{percent}%",
             'color': self.COLORS['green'] if is_winner else self.COLORS['red'],
             'stroke_color': self.COLORS['white'] if is_winner else self.COLORS['black'],
             **self.PERCENT_STYLE
         }
-        return TextClip(**style)
 
-    def _apply_cross_fade_in(
-            self, 
-            clip: ImageClip, 
-            position: Tuple[float, float], 
-            duration: float, 
-            start: float
-        ) -> CompositeVideoClip:
+    def _create_text_clip(self, text: str, stroke_color: str) -> ImageClip:
         """
-        Apply crossfade animation to a clip.
+        Create a standardized text clip with consistent styling.
         Args:
-            clip: The clip to animate
-            position: (x, y) position tuple
-            duration: How long the clip should last
-            start: When the animation should begin
+            text: The text to display
+            stroke_color: Color for text outline
         Returns:
-            CompositeVideoClip with the animation applied
+            Cached label clip with standardized styling
         """
-        clip = clip.with_duration(duration)
-        return (
-            CompositeVideoClip([
-                    clip.with_effects([CrossFadeIn(self.ANIMATION_DURATIONS['fade'])])
-                ]
-            )
-            .with_start(start)
-            .with_position(position)
-        )
+        return self._create_label_clip(self._text_style(text, stroke_color))
 
-    def _apply_slide_in(
-            self, 
-            clip: ImageClip, 
-            position: Tuple[float, float], 
-            side: str, 
-            duration: float
-        ) -> CompositeVideoClip:
+    def _create_percent_clip(self, percent: int, is_winner: bool) -> ImageClip:
         """
-        Apply slide-in animation from outside the screen.
+        Create a percentage display clip with win/lose styling.
         Args:
-            clip: The clip to animate
-            position: Target (x, y) position
-            side: Which side to slide from ('left' or 'right')
-            duration: Total clip duration
+            percent: The percentage value to display
+            is_winner: Whether this option won
         Returns:
-            Animated CompositeVideoClip
+            Cached label clip showing the percentage
         """
-        width, height = self.VIDEO_DIMENSIONS
-        x, y = position
+        return self._create_label_clip(self._percent_style(percent, is_winner))
 
-        # Calculate starting position outside the screen
+    @classmethod
+    def warm_up(cls):
+        """
+        Decode shared assets and rasterize every percent label (0-100%, both
+        styles) up front. Registered as a render executor initializer.
+        """
+        strategy = cls()
+        strategy._load_assets()
+        for percent in range(101):
+            for is_winner in (True, False):
+                label_cache.get(strategy._percent_style(percent, is_winner), pin=True)
+        logger.info(f"Render worker warmed up. Label cache: {label_cache.stats()}")
+
+    def _offscreen(self, image: np.ndarray, position: Tuple[float, float], side: str) -> Tuple[float, float]:
+        """Position just outside the screen on the given side ('left' or 'right'), at the same height."""
+        x, y = position
         if side == "left":
-            start_pos = (-clip.size[0], y)
-        elif side == "right":
-            start_pos = (width, y)
-        else:
-            start_pos = position
-
-        # Animate from starting position to target position
-        return clip.with_position(lambda t: (
-            start_pos[0] + (x - start_pos[0]) * min(1, t/self.ANIMATION_DURATIONS['slide']),
-            y  # Keep same vertical position
-        )).with_duration(duration)
-
-    def _apply_slide_out(
-            self, 
-            clip: ImageClip, 
-            position: Tuple[float, float], 
-            side: str
-        ) -> CompositeVideoClip:
-        """
-        Apply slide-out animation to outside the screen.
+            return (-image.shape[1], y)
+        if side == "right":
+            return (self.VIDEO_DIMENSIONS[0], y)
+        return position
+
+    def _slide_in_layer(
+            self,
+            image: np.ndarray,
+            position: Tuple[float, float],
+            side: str,
+            start: float,
+            end: float
+        ) -> Layer:
+        """
+        Layer sliding in from outside the screen.
         Args:
-            clip: The clip to animate
+            image: The layer's pixels
+            position: Target (x, y) position
+            side: Which side to slide from ('left' or 'right')
+            start: When the slide begins
+            end: When the layer disappears
+        Returns:
+            Animated layer
+        """
+        origin = self._offscreen(image, position, side)
+        return Layer(image, start, end, origin, position, self.ANIMATION_DURATIONS['slide'])
+
+    def _slide_out_layer(
+            self,
+            image: np.ndarray,
+            position: Tuple[float, float],
+            side: str,
+            start: float,
+            fade: float = 0.0
+        ) -> Layer:
+        """
+        Layer sliding out to outside the screen.
+        Args:
+            image: The layer's pixels
             position: Current (x, y) position
             side: Which side to slide to ('left' or 'right')
+            start: When the slide begins
+            fade: Fade-in replayed while sliding, in seconds
         Returns:
-            Animated CompositeVideoClip
+            Animated layer
         """
-        width, height = self.VIDEO_DIMENSIONS
-        x, y = position
+        target = self._offscreen(image, position, side)
+        slide = self.ANIMATION_DURATIONS['slide']
+        return Layer(image, start, start + slide, position, target, slide, fade)
 
-        # Calculate ending position outside the screen
-        if side == "left":
-            end_pos = (-clip.size[0], y)
-        elif side == "right":
-            end_pos = (width, y)
-        else:
-            end_pos = position
-
-        # Animate from current position to ending position
-        return clip.with_position(lambda t: (
-            x + (end_pos[0] - x) * min(1, t/self.ANIMATION_DURATIONS['slide']),
-            y  # Keep same vertical position
-        )).with_duration(self.ANIMATION_DURATIONS['slide'])
+    def _fade_in_layer(self, image: np.ndarray, position: Tuple[float, float], start: float, end: float) -> Layer:
+        """Layer fading in at a fixed position."""
+        return Layer(image, start, end, position, fade=self.ANIMATION_DURATIONS['fade'])
 
     def _calculate_positions(self) -> Dict:
         """
@@ -252,9 +278,9 @@ class ChoicesEditingStrategy(ABC):
         """
         width, height = self.VIDEO_DIMENSIONS
 
-        def center_x(clip: ImageClip) -> float:
-            """Helper to calculate centered x position for any clip"""
-            return (width - clip.size[0]) // 2
+        def center_x(image: np.ndarray) -> float:
+            """Helper to calculate centered x position for any image"""
+            return (width - image.shape[1]) // 2
 
         return {
             'img1_y': height * self.POSITION_FACTORS['img1_y'],
@@ -264,44 +290,129 @@ class ChoicesEditingStrategy(ABC):
             'center_x_func': center_x
         }
 
-    def _create_audio_timeline(
-            self, 
-            audio1: AudioFileClip, 
-            audio2: AudioFileClip, 
-            assets: Dict, 
-            audio_duration: float,
-            audio_duration_and_tick: float,
-            audio_final: float
-        ) -> AudioFileClip:
-        """
-        Compose the complete audio timeline for a choice segment.
+    def _segment_timing(self, audio1: np.ndarray, audio2: np.ndarray, assets: Dict) -> Dict[str, float]:
+        """
+        Timing of a choice segment, derived from its voice lines.
+        Returns:
+            Dictionary containing:
+            - audio_duration: voice + OR sound + voice
+            - audio_duration_and_tick: when the tick ends and the percentages appear
+            - total_duration: when the notify sound ends and the segment with it
+            - slide_out_start: when the unified slide-out starts
+        """
+        audio_duration = duration_of(audio1) + duration_of(assets['or_sound']) + duration_of(audio2)
+        audio_duration_and_tick = audio_duration + self.ANIMATION_DURATIONS['tick']
+        total_duration = audio_duration_and_tick + duration_of(assets['notify'])
+        return {
+            'audio_duration': audio_duration,
+            'audio_duration_and_tick': audio_duration_and_tick,
+            'total_duration': total_duration,
+            'slide_out_start': total_duration - self.ANIMATION_DURATIONS['slide']
+        }
+
+    def _audio_cues(
+            self,
+            voice1: str,
+            voice2: str,
+            audio1: np.ndarray,
+            assets: Dict,
+            timing: Dict[str, float]
+        ) -> List[AudioCue]:
+        """
+        Lay out every sound of a choice segment on the segment timeline.
         Args:
-            audio1: First option audio clip
-            audio2: Second option audio clip
+            voice1: Source name of the first option voice
+            voice2: Source name of the second option voice
+            audio1: First option voice PCM
             assets: Dictionary of shared assets
-            audio_duration: Duration of voice + OR sound
-            audio_duration_and_tick: Total duration including tick sound
+            timing: Segment timing from _segment_timing
+        Returns:
+            Cues with start offsets relative to the segment start
+        """
+        or_start = duration_of(audio1)
+
+        return [
+            AudioCue(voice1, 0),
+            AudioCue('or_sound', or_start),
+            AudioCue(voice2, or_start + duration_of(assets['or_sound'])),
+            AudioCue('tic_tac', timing['audio_duration'], length=self.ANIMATION_DURATIONS['tick']),
+            AudioCue('notify', timing['audio_duration_and_tick'], gain=0.2),
+            AudioCue('swipe', timing['slide_out_start'], gain=3, skip=0.1)
+        ]
+
+    @staticmethod
+    def _create_audio_tracks(cues: List[AudioCue], sources: Dict[str, np.ndarray]) -> List[AudioTrack]:
+        """
+        Resolve cues to PCM tracks for the mixdown.
+        Args:
+            cues: Sounds on the timeline
+            sources: PCM for each cue source
         Returns:
-            Concatenated AudioFileClip with all sounds
+            Tracks with the cues' start offsets
+        """
+        tracks = []
+        for cue in cues:
+            pcm = sources[cue.source][int(cue.skip * AUDIO_FPS):]
+            if cue.length is not None:
+                pcm = pcm[:int(cue.length * AUDIO_FPS)]
+            tracks.append(AudioTrack(pcm, cue.start, cue.gain))
+        return tracks
+
+    @staticmethod
+    def _rgba(clip: ImageClip) -> np.ndarray:
+        """A still clip's pixels with its mask, if any, as the alpha channel."""
+        frame = clip.get_frame(0)
+        if clip.mask is None:
+            return frame.astype(np.uint8)
+        alpha = np.clip(clip.mask.get_frame(0) * 255, 0, 255)
+        return np.dstack([frame, alpha]).astype(np.uint8)
+
+    def _segment_sound(self, choice: Dict, assets: Dict, index: int) -> Dict:
         """
-        tick_audio = assets['tic_tac'].subclipped(0, self.ANIMATION_DURATIONS['tick'])
-        swipe_audio = assets['swipe'].subclipped(0.1, assets['swipe'].duration)
+        Lay out the sounds of one choice segment, which also time the segment.
+        Args:
+            choice: The choice to lay out
+            assets: Dictionary of shared assets
+            index: Position of the choice in the video, to name its voice sources
+        Returns:
+            Dictionary containing:
+            - duration: segment duration
+            - timing: segment timing from _segment_timing
+            - cues: audio cues, timed from the segment start
+            - media: voice file path or bytes per voice source
+            - pcm: decoded voice per voice source
+        """
+        opt1, opt2 = choice['option_1'], choice['option_2']
+        audio1 = decode_audio(self._media(opt1, 'audio'))
+        audio2 = decode_audio(self._media(opt2, 'audio'))
+        timing = self._segment_timing(audio1, audio2, assets)
 
-        return concatenate_audioclips([
-            audio1,
-            assets['or_sound'],
-            audio2,
-            tick_audio.with_start(audio_duration),
-            assets['notify'].with_effects([MultiplyVolume(0.2)]).with_start(audio_duration_and_tick),
-            swipe_audio.with_effects([MultiplyVolume(3)]).with_start(audio_final)
-        ])
+        voice1, voice2 = f"voice_{index}_1", f"voice_{index}_2"
+        return {
+            'duration': timing['total_duration'],
+            'timing': timing,
+            'cues': self._audio_cues(voice1, voice2, audio1, assets, timing),
+            'media': {voice1: self._media(opt1, 'audio'), voice2: self._media(opt2, 'audio')},
+            'pcm': {voice1: audio1, voice2: audio2}
+        }
 
-    def _process_choice_segment(self, choice: Dict, assets: Dict) -> CompositeVideoClip:
+    def _segment_layers(self, choice: Dict, assets: Dict, index: int) -> Dict:
         """
-        Process one choice segment with correct timing:
+        Lay out one choice segment as flat layers and audio cues:
         - Texts disappear when notify starts
         - Percentages stay until notify ends
         - Unified slideout after notify
+        Args:
+            choice: The choice to lay out
+            assets: Dictionary of shared assets
+            index: Position of the choice in the video, to name its voice sources
+        Returns:
+            Dictionary containing:
+            - duration: segment duration
+            - layers: layers in stacking order, timed from the segment start
+            - cues: audio cues, timed from the segment start
+            - media: voice file path or bytes per voice source
+            - pcm: decoded voice per voice source
         """
         pos_data = self._calculate_positions()
         center_x = pos_data['center_x_func']
@@ -310,147 +421,495 @@ class ChoicesEditingStrategy(ABC):
         is_opt1_winner = opt1['percentages'] > opt2['percentages']
 
         # Load audio and calculate durations
-        audio1 = AudioFileClip(opt1['audio_path'])
-        audio2 = AudioFileClip(opt2['audio_path'])
-        audio_duration = audio1.duration + assets['or_sound'].duration + audio2.duration
-        audio_duration_and_tick = audio_duration + self.ANIMATION_DURATIONS['tick']
-        total_duration = audio_duration_and_tick + assets['notify'].duration
+        sound = self._segment_sound(choice, assets, index)
+        timing = sound['timing']
+        shown = timing['audio_duration_and_tick']
+        slide_out_start = timing['slide_out_start']
 
         # Create all visual elements
-        img1 = self._create_image_clip(opt1['image_path'])
-        img2 = self._create_image_clip(opt2['image_path'])
-        text1 = self._create_text_clip(opt1['text'], self.COLORS["blue"])
-        text2 = self._create_text_clip(opt2['text'], self.COLORS["red"])
-        percent1 = self._create_percent_clip(opt1['percentages'], is_opt1_winner)
-        percent2 = self._create_percent_clip(opt2['percentages'], not is_opt1_winner)
+        img1 = self._rgba(self._create_image_clip(self._media(opt1, 'image')))
+        img2 = self._rgba(self._create_image_clip(self._media(opt2, 'image')))
+        text1 = self._rgba(self._create_text_clip(opt1['text'], self.COLORS["blue"]))
+        text2 = self._rgba(self._create_text_clip(opt2['text'], self.COLORS["red"]))
+        percent1 = self._rgba(self._create_percent_clip(opt1['percentages'], is_opt1_winner))
+        percent2 = self._rgba(self._create_percent_clip(opt2['percentages'], not is_opt1_winner))
 
         # Calculate positions
         img1_pos = (center_x(img1), pos_data['img1_y'])
         img2_pos = (center_x(img2), pos_data['img2_y'])
-        text1_pos = (center_x(text1), pos_data['text1_y'] - text1.size[1]/2)
-        text2_pos = (center_x(text2), pos_data['text2_y'] - text2.size[1]/2)
-        percent1_pos = (center_x(percent1), pos_data['text1_y'] - percent1.size[1]/2)
-        percent2_pos = (center_x(percent2), pos_data['text2_y'] - percent2.size[1]/2)
-
-        # Create sliding in animations
-        img1_slide_in = self._apply_slide_in(img1, img1_pos, "left", total_duration)
-        img2_slide_in = self._apply_slide_in(img2, img2_pos, "right", total_duration)
-        text1_slide_in = self._apply_slide_in(text1, text1_pos, "left", audio_duration_and_tick)
-        text2_slide_in = self._apply_slide_in(text2, text2_pos, "right", audio_duration_and_tick)
-
-        # Percentage fade-in
-        percent1 = self._apply_cross_fade_in(
-            percent1,
-            percent1_pos,
-            assets['notify'].duration,
-            audio_duration_and_tick
+        text1_pos = (center_x(text1), pos_data['text1_y'] - text1.shape[0]/2)
+        text2_pos = (center_x(text2), pos_data['text2_y'] - text2.shape[0]/2)
+        percent1_pos = (center_x(percent1), pos_data['text1_y'] - percent1.shape[0]/2)
+        percent2_pos = (center_x(percent2), pos_data['text2_y'] - percent2.shape[0]/2)
+
+        fade = self.ANIMATION_DURATIONS['fade']
+        layers = [
+            # Images
+            self._slide_in_layer(img1, img1_pos, "left", 0, slide_out_start),
+            self._slide_in_layer(img2, img2_pos, "right", 0, slide_out_start),
+
+            # Texts
+            self._slide_in_layer(text1, text1_pos, "left", 0, shown),
+            self._slide_in_layer(text2, text2_pos, "right", 0, shown),
+
+            # Percentages
+            self._fade_in_layer(percent1, percent1_pos, shown, slide_out_start),
+            self._fade_in_layer(percent2, percent2_pos, shown, slide_out_start),
+
+            # Unified slide out; the percentages replay their fade-in while
+            # sliding, as they always have
+            self._slide_out_layer(img1, img1_pos, "right", slide_out_start),
+            self._slide_out_layer(img2, img2_pos, "left", slide_out_start),
+            self._slide_out_layer(percent1, percent1_pos, "right", slide_out_start, fade),
+            self._slide_out_layer(percent2, percent2_pos, "left", slide_out_start, fade),
+        ]
+
+        return {
+            'duration': sound['duration'],
+            'layers': layers,
+            'cues': sound['cues'],
+            'media': sound['media'],
+            'pcm': sound['pcm']
+        }
+
+    def _compile(self, choices: List[Dict], assets: Dict) -> Dict:
+        """
+        Flatten choice segments, back to back, into one timeline.
+        Args:
+            choices: Choices in playing order
+            assets: Dictionary of shared assets
+        Returns:
+            Dictionary with the same keys as _segment_layers, for the whole timeline
+        """
+        timeline = {'duration': 0.0, 'layers': [], 'cues': [], 'media': {}, 'pcm': {}}
+        for index, choice in enumerate(choices):
+            segment = self._segment_layers(choice, assets, index)
+            offset = timeline['duration']
+            timeline['layers'].extend(layer.shifted(offset) for layer in segment['layers'])
+            timeline['cues'].extend(cue.shifted(offset) for cue in segment['cues'])
+            timeline['media'].update(segment['media'])
+            timeline['pcm'].update(segment['pcm'])
+            timeline['duration'] += segment['duration']
+        return timeline
+
+    def _timeline_clip(self, timeline: Dict, cues: List[AudioCue], assets: Dict) -> TimelineClip:
+        """
+        The timeline as a single clip with its mixed audio.
+        Args:
+            timeline: Timeline from _compile
+            cues: Audio cues to mix
+            assets: Dictionary of shared assets
+        Returns:
+            TimelineClip ready to encode
+        """
+        clip = TimelineClip(assets['bg_image'], timeline['layers'], timeline['duration'], self.OUTPUT_FPS)
+        tracks = self._create_audio_tracks(cues, {**assets, **timeline['pcm']})
+        return clip.with_audio(to_audio_clip(mixdown(tracks, timeline['duration'])))
+
+    def _encoding_params(self, profile: EncoderProfile, threads: int) -> Dict:
+        """
+        Video encoding parameters shared by every render mode, so that
+        independently encoded segments can be concatenated without re-encoding.
+        Args:
+            profile: Encoder profile of the job
+            threads: Number of encoder threads
+        Returns:
+            Keyword arguments for write_videofile
+        """
+        return profile.moviepy_params(self.OUTPUT_FPS, threads)
+
+    def _ffmpeg_encoder_args(self, profile: EncoderProfile, threads: int) -> List[str]:
+        """The same encoding parameters, for renders that drive ffmpeg directly."""
+        return profile.ffmpeg_args(self.OUTPUT_FPS, threads)
+
+    def _render_single(self, content: Dict, output_path: str, profile: EncoderProfile, threads: int) -> str:
+        """
+        Render all segments as one flat timeline through a single encoder.
+        Runs inside a render executor worker.
+        Args:
+            content: Dictionary containing all choices and options
+            output_path: Destination video file
+            profile: Encoder profile of the job
+            threads: Number of encoder threads
+        Returns:
+            The output path
+        """
+        assets = self._load_assets()
+        timeline = self._compile(content['choices'], assets)
+
+        # Mix every sound and the background music in a single pass
+        cues = [AudioCue('bg_music', gain=self.BG_MUSIC_VOLUME), *timeline['cues']]
+        final_video = self._timeline_clip(timeline, cues, assets)
+        try:
+            final_video.write_videofile(
+                output_path,
+                audio_codec=self.AUDIO_CODEC,
+                **self._encoding_params(profile, threads)
+            )
+        finally:
+            final_video.close()
+
+        logger.debug(f"Label cache: {label_cache.stats()}")
+        return output_path
+
+    def _render_filtergraph(self, content: Dict, output_path: str, profile: EncoderProfile, threads: int) -> str:
+        """
+        Render the whole video in one native ffmpeg process, bypassing moviepy's
+        compositor. Runs inside a render executor worker.
+        Args:
+            content: Dictionary containing all choices and options
+            output_path: Destination video file
+            profile: Encoder profile of the job
+            threads: Number of encoder threads
+        Returns:
+            The output path
+        """
+        assets = self._load_assets()
+        timeline = self._compile(content['choices'], assets)
+        sources = {name: self.ASSET_PATHS[name] for name in ('bg_music', 'or_sound', 'tic_tac', 'notify', 'swipe')}
+
+        render_filtergraph(
+            assets['bg_image'],
+            timeline['layers'],
+            [AudioCue('bg_music', gain=self.BG_MUSIC_VOLUME), *timeline['cues']],
+            {**sources, **timeline['media']},
+            timeline['duration'],
+            output_path,
+            self.OUTPUT_FPS,
+            self._ffmpeg_encoder_args(profile, threads),
+            self.AUDIO_CODEC
         )
-        percent2 = self._apply_cross_fade_in(
-            percent2,
-            percent2_pos,
-            assets['notify'].duration,
-            audio_duration_and_tick
+
+        logger.debug(f"Label cache: {label_cache.stats()}")
+        return output_path
+
+    def _segment_mix(self, segment: Dict, assets: Dict) -> np.ndarray:
+        """
+        Mix a segment's sounds to their full length, which may run past the segment.
+        Args:
+            segment: Segment from _segment_sound or _segment_layers
+            assets: Dictionary of shared assets
+        Returns:
+            float32 stereo PCM, starting with the segment
+        """
+        tracks = self._create_audio_tracks(segment['cues'], {**assets, **segment['pcm']})
+        length = max([segment['duration'], *(track.start + duration_of(track.pcm) for track in tracks)])
+        return mixdown(tracks, length)
+
+    def _stream_segment(self, choice: Dict, assets: Dict, index: int, offset: float) -> Tuple[TimelineClip, np.ndarray]:
+        """
+        Lay out one segment for streaming, with its sounds mixed to their full
+        length; whatever runs past the segment is carried into the next one.
+        Args:
+            choice: The choice to render
+            assets: Dictionary of shared assets
+            index: Position of the choice in the video
+            offset: Start of the segment in the video
+        Returns:
+            The segment clip and its PCM
+        """
+        segment = self._segment_layers(choice, assets, index)
+        clip = TimelineClip(assets['bg_image'], segment['layers'], segment['duration'], self.OUTPUT_FPS, offset)
+        return clip, self._segment_mix(segment, assets)
+
+    def _stream_segments(self, choices: List[Dict], assets: Dict) -> Iterator[Tuple[TimelineClip, np.ndarray]]:
+        """Lazily lay out segments, so only the one being encoded is ever in memory."""
+        offset = 0.0
+        for index, choice in enumerate(choices):
+            clip, pcm = self._stream_segment(choice, assets, index, offset)
+            # Summed as stream_segments does, so both agree on the frame grid
+            offset += clip.duration
+            yield clip, pcm
+
+    def _render_streaming(self, content: Dict, output_path: str, profile: EncoderProfile, threads: int) -> str:
+        """
+        Render segments one at a time, piping their frames straight into the
+        encoder, so memory stays flat whatever the number of choices.
+        Runs inside a render executor worker.
+        Args:
+            content: Dictionary containing all choices and options
+            output_path: Destination video file
+            profile: Encoder profile of the job
+            threads: Number of encoder threads
+        Returns:
+            The output path
+        """
+        assets = self._load_assets()
+        stream_segments(
+            self._stream_segments(content['choices'], assets),
+            output_path,
+            self.VIDEO_DIMENSIONS,
+            self.OUTPUT_FPS,
+            self._ffmpeg_encoder_args(profile, threads),
+            self.ASSET_PATHS['bg_music'],
+            self.BG_MUSIC_VOLUME,
+            self.AUDIO_CODEC,
+            settings.RENDER_FRAME_QUEUE
         )
 
-        # Slide-out timing (AFTER notify sound completes)
-        slide_out_start = total_duration - self.ANIMATION_DURATIONS['slide']
-
-        img1_slide_out = self._apply_slide_out(img1, img1_pos, "right").with_start(slide_out_start)
-        img2_slide_out = self._apply_slide_out(img2, img2_pos, "left").with_start(slide_out_start)
-        percent1_slide_out = self._apply_slide_out(percent1, percent1_pos, "right").with_start(slide_out_start)
-        percent2_slide_out = self._apply_slide_out(percent2, percent2_pos, "left").with_start(slide_out_start)
-
-        # Build audio timeline
-        audio_timeline = self._create_audio_timeline(
-            audio1,
-            audio2,
-            assets,
-            audio_duration,
-            audio_duration_and_tick,
-            slide_out_start
+        logger.debug(f"Label cache: {label_cache.stats()}")
+        return output_path
+
+    def _segment_samples(self, duration: float) -> int:
+        """Audio samples of an independently encoded segment, matching the whole frames moviepy writes of it."""
+        frames = int(duration * self.OUTPUT_FPS)
+        return int(round(frames / self.OUTPUT_FPS * AUDIO_FPS))
+
+    def _render_segment(
+            self,
+            choice: Dict,
+            previous: Optional[Dict],
+            output_path: str,
+            profile: EncoderProfile,
+            threads: int
+        ) -> str:
+        """
+        Encode a single choice segment on its own. Runs inside a render executor worker.
+        Sounds of the previous segment that run past its end are carried into
+        this one, as streaming does, so segments can be encoded independently.
+        Args:
+            choice: The choice to render
+            previous: The choice played before it, if any
+            output_path: Destination segment file
+            profile: Encoder profile of the job
+            threads: Number of encoder threads
+        Returns:
+            The segment path
+        """
+        assets = self._load_assets()
+        timeline = self._compile([choice], assets)
+
+        carry = np.zeros((0, 2), dtype=np.float32)
+        if previous is not None:
+            prior = self._segment_sound(previous, assets, -1)
+            _, carry = carry_over(self._segment_mix(prior, assets), carry, self._segment_samples(prior['duration']))
+        # The mix is cut to the segment's video, so the concat demuxer leaves no
+        # gaps and audio and video don't drift apart over the segments
+        pcm, _ = carry_over(self._segment_mix(timeline, assets), carry, self._segment_samples(timeline['duration']))
+
+        segment = TimelineClip(assets['bg_image'], timeline['layers'], timeline['duration'], self.OUTPUT_FPS)
+        segment = segment.with_audio(to_audio_clip(pcm))
+        try:
+            segment.write_videofile(
+                output_path,
+                audio_codec=self.SEGMENT_AUDIO_CODEC,
+                temp_audiofile_path=os.path.dirname(output_path),
+                logger=None,
+                **self._encoding_params(profile, threads)
+            )
+        finally:
+            segment.close()
+
+        logger.debug(f"Label cache: {label_cache.stats()}")
+        return output_path
+
+    async def _render_segmented(self, content: Dict, output_path: str, profile: EncoderProfile) -> float:
+        """
+        Encode every choice segment in parallel on the render executor,
+        then join them losslessly and mux in the background music.
+        Args:
+            content: Dictionary containing all choices and options
+            output_path: Destination video file
+            profile: Encoder profile of the job
+        Returns:
+            Time render processes spent on the video, in seconds
+        """
+        threads = render_executor.encode_threads
+
+        with tempfile.TemporaryDirectory(dir=settings.VIDEOS_TMP_DIR) as segment_dir:
+            segment_paths = [
+                os.path.join(segment_dir, f"segment_{idx:03d}.{self.SEGMENT_EXTENSION}")
+                for idx in range(len(content['choices']))
+            ]
+
+            renders = await asyncio.gather(*(
+                render_executor.run_timed(self._render_segment, choice, previous, path, profile, threads)
+                for choice, previous, path in zip(content['choices'], [None, *content['choices']], segment_paths)
+            ))
+
+            _, concat_seconds = await render_executor.run_timed(
+                concat_segments,
+                segment_paths,
+                output_path,
+                self.ASSET_PATHS['bg_music'],
+                self.BG_MUSIC_VOLUME,
+                self.AUDIO_CODEC
+            )
+        return sum(seconds for _, seconds in renders) + concat_seconds
+
+    def _backend(self, options: Optional[Dict]) -> str:
+        """The job's render backend, validated."""
+        backend = (options or {}).get("backend", settings.RENDER_BACKEND)
+        if backend not in self.RENDER_BACKENDS:
+            raise ValueError(f"Unknown render backend {backend}")
+        return backend
+
+    @staticmethod
+    def _temp_files(choice: Dict) -> List[str]:
+        """Scraped media files of a choice, deleted once the video is rendered."""
+        return list(filter(None, [
+            choice['option_1'].get('image_path'), choice['option_1'].get('audio_path'),
+            choice['option_2'].get('image_path'), choice['option_2'].get('audio_path')
+        ]))
+
+    @staticmethod
+    def _delete_temp_files(file_paths: List[str]):
+        for file_path in file_paths:
+            try:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            except Exception as e:
+                logger.error(f"Error deleting temporary file {file_path}: {str(e)}")
+
+    @staticmethod
+    def _profile(account: str, options: Optional[Dict]) -> EncoderProfile:
+        """The job's encoder profile, else the account's, else the default one."""
+        name = (options or {}).get("profile") or settings.RENDER_ACCOUNT_PROFILES.get(account) or settings.RENDER_PROFILE
+        return encoder_profile(name)
+
+    @staticmethod
+    def _record(account: str, output_path: str, profile: EncoderProfile, elapsed: float):
+        """
+        Register a rendered video in the manifest, with what its encoder profile cost and produced.
+        `elapsed` is the time render processes spent on the video, so queueing
+        for a free one or waiting on scraping doesn't count against the profile.
+        """
+        duration = ffmpeg_parse_infos(output_path)["duration"]
+        size = os.path.getsize(output_path)
+        video_manifest.add(account, output_path, profile.name, elapsed, duration, size)
+        logger.info(
+            f"Rendered {output_path} with encoder profile {profile.name}: {duration:.1f}s of video "
+            f"in {elapsed:.1f}s ({duration / elapsed:.2f}x realtime), {size / 1024 / 1024:.1f} MiB"
         )
 
-        # Compose final clip
-        return CompositeVideoClip([
-            assets['bg_image'].with_duration(total_duration),
-            
-            # Images
-            img1_slide_in.with_end(slide_out_start),
-            img2_slide_in.with_end(slide_out_start),
-            
-            # Texts
-            text1_slide_in,
-            text2_slide_in,
-            
-            # Percentages
-            percent1.with_end(slide_out_start),
-            percent2.with_end(slide_out_start),
-            
-            # Unified slide out
-            img1_slide_out,
-            img2_slide_out,
-            percent1_slide_out,
-            percent2_slide_out
-        ]).with_audio(audio_timeline)
-
-    async def edit(self, account: str, content: Dict) -> str:
+    def _output_path(self, account: str) -> str:
+        return f"{settings.VIDEOS_TMP_DIR}{account}_{int(time.time())}.mp4"
+
+    async def edit(self, account: str, content: Dict, options: Optional[Dict] = None) -> str:
         """
         Main method to edit the complete video from content.
         Args:
             content: Dictionary containing all choices and options
+            options: Per-job render options, e.g. {"backend": "ffmpeg", "profile": "final"}
         Returns:
             Path to the generated video file
         Raises:
             Exception: If any error occurs during video processing
         """
+        backend = self._backend(options)
+        profile = self._profile(account, options)
+
         try:
-            assets = await self._load_assets()
-            final_clips = []
             temp_files_to_delete = []
-            
             for choice in content['choices']:
-                temp_files_to_delete.extend([
-                    choice['option_1']['image_path'], choice['option_1']['audio_path'],
-                    choice['option_2']['image_path'], choice['option_2']['audio_path']
-                ])
-
-                segment = self._process_choice_segment(choice, assets)
-                final_clips.append(segment)
-            
-            # Concatenate all segments
-            final_video = concatenate_videoclips(final_clips)
-            
-            # Add background music
-            bg_music = assets['bg_music'].with_effects([MultiplyVolume(0.1)])
-            final_audio = CompositeAudioClip([bg_music, final_video.audio])
-            final_video = final_video.with_audio(final_audio)
-            
-            # Save the video
-            output_path = f"{settings.VIDEOS_TMP_DIR}{account}_{int(time.time())}.mp4"
-
-            final_video.write_videofile(
-                output_path,
-                fps=self.OUTPUT_FPS,
-                codec=self.OUTPUT_CODEC,
-                audio_codec=self.AUDIO_CODEC,
-                threads=self.PROCESSING_THREADS
-            )
-            
-            # Close all clips to free up resources
-            final_video.close()
-            for clip in final_clips:
-                clip.close()
+                temp_files_to_delete.extend(self._temp_files(choice))
+
+            output_path = self._output_path(account)
+
+            if backend == "ffmpeg":
+                _, elapsed = await render_executor.run_timed(
+                    self._render_filtergraph,
+                    content,
+                    output_path,
+                    profile,
+                    render_executor.encode_threads
+                )
+            elif settings.RENDER_MODE == "segmented":
+                elapsed = await self._render_segmented(content, output_path, profile)
+            elif settings.RENDER_MODE == "streaming":
+                _, elapsed = await render_executor.run_timed(
+                    self._render_streaming,
+                    content,
+                    output_path,
+                    profile,
+                    render_executor.encode_threads
+                )
+            else:
+                _, elapsed = await render_executor.run_timed(
+                    self._render_single,
+                    content,
+                    output_path,
+                    profile,
+                    render_executor.encode_threads
+                )
+
+            await asyncio.to_thread(self._record, account, output_path, profile, elapsed)
 
             # Deletes temporary files
-            for file_path in temp_files_to_delete:
+            self._delete_temp_files(temp_files_to_delete)
+
+            return output_path
+
+        except Exception as e:
+            logger.error(f"Error in video editing: {str(e)}")
+            raise
+
+    async def edit_stream(self, account: str, choices: AsyncIterator[Dict], options: Optional[Dict] = None) -> str:
+        """
+        Edit the video while its content is still being scraped: each choice's
+        segment is encoded on the render executor as soon as the choice arrives,
+        and the segments are joined once the last one is done.
+        The ffmpeg backend renders the whole video in one process, so with it
+        the choices are collected first and edited as usual.
+        Args:
+            choices: Fully resolved choices, in order
+            options: Per-job render options, e.g. {"backend": "ffmpeg", "profile": "final"}
+        Returns:
+            Path to the generated video file
+        Raises:
+            Exception: If any error occurs while scraping or video processing
+        """
+        if self._backend(options) == "ffmpeg":
+            return await self.edit(account, {"choices": [choice async for choice in choices]}, options)
+
+        profile = self._profile(account, options)
+
+        threads = render_executor.encode_threads
+        temp_files_to_delete = []
+        renders = []
+
+        try:
+            output_path = self._output_path(account)
+
+            with tempfile.TemporaryDirectory(dir=settings.VIDEOS_TMP_DIR) as segment_dir:
+                segment_paths = []
+                previous = None
                 try:
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                except Exception as e:
-                    logger.error(f"Error deleting temporary file {file_path}: {str(e)}")
-            
+                    async for choice in choices:
+                        temp_files_to_delete.extend(self._temp_files(choice))
+                        path = os.path.join(segment_dir, f"segment_{len(segment_paths):03d}.{self.SEGMENT_EXTENSION}")
+                        segment_paths.append(path)
+                        renders.append(asyncio.ensure_future(
+                            render_executor.run_timed(self._render_segment, choice, previous, path, profile, threads)
+                        ))
+                        previous = choice
+                        logger.info(f"Rendering segment {len(segment_paths)} while scraping continues")
+                    segment_seconds = sum(seconds for _, seconds in await asyncio.gather(*renders))
+                except BaseException:
+                    # Segments already handed to workers can't be stopped there;
+                    # let them end before their directory is removed
+                    await asyncio.gather(*renders, return_exceptions=True)
+                    raise
+
+                _, concat_seconds = await render_executor.run_timed(
+                    concat_segments,
+                    segment_paths,
+                    output_path,
+                    self.ASSET_PATHS['bg_music'],
+                    self.BG_MUSIC_VOLUME,
+                    self.AUDIO_CODEC
+                )
+
+            await asyncio.to_thread(self._record, account, output_path, profile, segment_seconds + concat_seconds)
+
+            # Deletes temporary files
+            self._delete_temp_files(temp_files_to_delete)
+
             return output_path
 
         except Exception as e:
             logger.error(f"Error in video editing: {str(e)}")
             raise
+
+# Percent labels only take 202 distinct forms; render them once per render process
+render_executor.register_initializer(ChoicesEditingStrategy.warm_up)
@@ -1,103 +1,231 @@
 from abc import ABC
 import asyncio
+from functools import partial
 import logging
+import uuid
+from typing import Optional
+from app.config import settings
 from app.core.apis import (DeepSeek, Google, Image)
+from app.core.bots.processing import TaskGraph, Workspace
+from ..bank import choice_bank
+from ..pool import content_pool
 
 logger = logging.getLogger('uvicorn.error')
 
 class ChoicesScrapingStrategy(ABC):
-    async def scrape(self, config):
+    CHOICES_PER_VIDEO = 5
+
+    async def scrape(self, config, workspace: Optional[Workspace] = None):
         logger.info(f"Choices scraping")
-        try:
-            text_scraping = await self.text(config["theme"])
-            image_scraping = await self.image(text_scraping)
-            return await self.text_to_speech(image_scraping)
-        except Exception as e:
-            raise e
+        theme = config["theme"]
+
+        account = config.get("account", "")
+
+        if content_pool.enabled:
+            content = content_pool.claim(theme, account, workspace.path if workspace else None)
+            # Top the pool back up while this job renders
+            content_pool.replenish(theme, account, self._scrape)
+            if content is not None:
+                return content
+
+        return await self._scrape(theme, workspace, account)
+
+    async def scrape_stream(self, config, workspace: Optional[Workspace] = None):
+        """
+        Yield choices one by one, in order, each as soon as its text, images
+        and speech are all resolved, so rendering can start before the last
+        choice has been scraped.
+        """
+        logger.info(f"Choices scraping, streamed")
+        theme = config["theme"]
+
+        account = config.get("account", "")
+
+        if content_pool.enabled:
+            content = content_pool.claim(theme, account, workspace.path if workspace else None)
+            content_pool.replenish(theme, account, self._scrape)
+            if content is not None:
+                for choice in content['choices']:
+                    yield choice
+                return
+
+        async for choice in self._scrape_stream(theme, workspace, account):
+            yield choice
+
+    async def _scrape(self, theme, workspace: Optional[Workspace] = None, account=""):
+        return {"choices": [choice async for choice in self._scrape_stream(theme, workspace, account)]}
+
+    async def _scrape_stream(self, theme, workspace: Optional[Workspace] = None, account=""):
+        graph = TaskGraph("choices scrape")
+        resolved = asyncio.Queue()
+        # Keeps media file names apart when several scrapes run at once
+        token = uuid.uuid4().hex[:8]
+
+        # Image and speech only depend on the option text, so each option's
+        # media starts as soon as its choice has been generated
+        async def choices():
+            idx = 0
+            async for choice in self.text_stream(theme, account):
+                graph.add(f"choice_{idx}", partial(self._arrived, choice))
+                for option_key in ['option_1', 'option_2']:
+                    self._add_option_nodes(graph, idx, option_key, choice[option_key], f"choice_{idx}", token, workspace)
 
-    async def text(self, theme):
-        logger.info(f"Scraping text")
+                # Chained to the previous choice, so choices come out in order
+                deps = [f"choice_{idx}_option_1.ready", f"choice_{idx}_option_2.ready"]
+                if idx:
+                    deps.append(f"choice_{idx - 1}.resolved")
+                graph.add(f"choice_{idx}.resolved", partial(resolved.put, choice), deps=deps)
+                idx += 1
 
+        graph.add("text", choices)
+        scrape = asyncio.create_task(graph.wait())
         try:
-            prompt = f"""
-            I want you to return a json "Would you rather..." in the following format:
-            {{
-                "choices": [
-                    {{
-                        "option_1": {{"text": "...", "image_keywords": "...", "percentages": 60}},
-                        "option_2": {{"text": "...", "image_keywords": "...", "percentages": 40}}
-                    }}
-                ]
-            }}
-
-            "choices" is a json list with several possible choices, I want it to have 5 different choices
-            "text" has the choices, and "option_1" and "option_2" need to have some relationship that makes sense for the choice between the two options
-            "image_keywords" has keywords to search for images on Wikimedia. Make sure to keep it as simple as possible, just the minimum. Keep only the main theme of the option. For example, if the option is about a character or organization from an anime, the keywords will only have the name of the anime
-            "percentages" can be any, vary the percentages according to each choice
-
-            I want the choices to be about just one topic: {theme}. Also, I want the choices to be interesting, fun, and controversial.
-
-            Make sure each option has only one sentence.
-            Make sure the image_keywords are not the same.
-            Do not include the phrase "Would you rather" in the options.
-            Remember to return only the json, don't use any markdown.
-            I don't want any markdown or comments.
-            """
-
-            return await DeepSeek.execute(prompt)
+            while not (scrape.done() and resolved.empty()):
+                choice = asyncio.create_task(resolved.get())
+                await asyncio.wait([choice, scrape], return_when=asyncio.FIRST_COMPLETED)
+                if choice.done():
+                    yield choice.result()
+                else:
+                    choice.cancel()
+                    # Raises if any node failed
+                    scrape.result()
+            # The loop also ends once everything queued was handed out, and a
+            # failure after the last resolved choice must still reach the caller
+            scrape.result()
+            graph.log_timings()
+        finally:
+            # Also reached when the consumer stops early: nothing keeps scraping for nobody
+            if not scrape.done():
+                scrape.cancel()
+                await graph.cancel()
 
-        except Exception as e:
-            raise e
-
-    async def image(self, content):
-        logger.info(f"Scraping image")
+    async def text(self, theme):
+        logger.info(f"Scraping text")
 
         try:
-            tasks = []
-            for idx, choice in enumerate(content['choices']):
-                for option_key in ['option_1', 'option_2']:
-                    keywords = choice[option_key]['image_keywords']
-                    filename = f"choice_{idx}_{option_key}.jpg"
-                    tasks.append(
-                        Image.get_image(keywords, filename)
-                    )
-
-            results = await asyncio.gather(*tasks)
-
-            index = 0
-            for choice in content['choices']:
-                for option_key in ['option_1', 'option_2']:
-                    choice[option_key]['image_path'] = results[index]
-                    index += 1
-
-            return content
+            return await DeepSeek.execute(self._prompt(theme))
 
         except Exception as e:
             raise e
 
-    async def text_to_speech(self, content):
-        logger.info(f"Scraping text-to-speech content")
-
+    async def text_stream(self, theme, account=""):
+        """
+        Yield choices one by one: drawn from the choice bank when it is enabled,
+        otherwise as the model writes them. Falls back to a regular request when
+        streaming is disabled or fails before the first choice.
+        """
+        if choice_bank.enabled:
+            try:
+                choices = await choice_bank.take(theme, account, self.CHOICES_PER_VIDEO, self.generate)
+            except Exception as e:
+                logger.error(f"Choice bank unavailable, generating choices directly: {str(e)}")
+                choices = []
+            # The bank hands out a full video's worth or nothing, so short falls back below
+            if choices:
+                for choice in choices:
+                    yield choice
+                return
+
+        if settings.DEEPSEEK_STREAM:
+            streamed = 0
+            try:
+                async for choice in DeepSeek.stream(self._prompt(theme), "choices"):
+                    streamed += 1
+                    yield choice
+                return
+            except Exception as e:
+                if streamed:
+                    raise e
+                logger.warning(f"DeepSeek streaming failed, retrying without streaming: {str(e)}")
+
+        content = await self.text(theme)
+        for choice in content['choices']:
+            yield choice
+
+    async def generate(self, theme, count):
+        """Generate a batch of choices in one request, keeping what arrived if the stream breaks off."""
+        if not settings.DEEPSEEK_STREAM:
+            return (await DeepSeek.execute(self._prompt(theme, count)))['choices']
+
+        choices = []
         try:
-            tasks = []
-            for idx, choice in enumerate(content['choices']):
-                for option_key in ['option_1', 'option_2']:
-                    option = choice[option_key]
-                    filename = f"choice_{idx}_{option_key}.wav"
-                    text = option.get('text')
-                    if text:
-                        tasks.append(
-                            Google.text_to_speech(text, filename)
-                        )
-
-            results = await asyncio.gather(*tasks)
-
-            index = 0
-            for choice in content['choices']:
-                for option_key in ['option_1', 'option_2']:
-                    choice[option_key]['audio_path'] = results[index]
-                    index += 1
-
-            return content
+            async for choice in DeepSeek.stream(self._prompt(theme, count), "choices"):
+                choices.append(choice)
         except Exception as e:
-            raise e
+            if not choices:
+                raise e
+            logger.warning(f"DeepSeek stream broke off after {len(choices)} choices: {str(e)}")
+        return choices
+
+    @staticmethod
+    async def _arrived(choice):
+        return choice
+
+    @classmethod
+    def _prompt(cls, theme, count=None):
+        return f"""
+        I want you to return a json "Would you rather..." in the following format:
+        {{
+            "choices": [
+                {{
+                    "option_1": {{"text": "...", "image_keywords": "...", "percentages": 60}},
+                    "option_2": {{"text": "...", "image_keywords": "...", "percentages": 40}}
+                }}
+            ]
+        }}
+
+        "choices" is a json list with several possible choices, I want it to have {count or cls.CHOICES_PER_VIDEO} different choices
+        "text" has the choices, and "option_1" and "option_2" need to have some relationship that makes sense for the choice between the two options
+        "image_keywords" has keywords to search for images on Wikimedia. Make sure to keep it as simple as possible, just the minimum. Keep only the main theme of the option. For example, if the option is about a character or organization from an anime, the keywords will only have the name of the anime
+        "percentages" can be any, vary the percentages according to each choice
+
+        I want the choices to be about just one topic: {theme}. Also, I want the choices to be interesting, fun, and controversial.
+
+        Make sure each option has only one sentence.
+        Make sure the image_keywords are not the same.
+        Do not include the phrase "Would you rather" in the options.
+        Remember to return only the json, don't use any markdown.
+        I don't want any markdown or comments.
+        """
+
+    def _add_option_nodes(
+            self,
+            graph: TaskGraph,
+            idx: int,
+            option_key: str,
+            option: dict,
+            dep: str,
+            token: str,
+            workspace: Optional[Workspace]
+        ):
+        """
+        Fetch an option's image and speech concurrently, then mark the option ready.
+        Media lands in the workspace, or stays in memory as bytes when the workspace is in-memory.
+        """
+        name = f"choice_{idx}_{option_key}"
+        filename = f"{token}_{name}"
+        in_memory = workspace is not None and workspace.in_memory
+        directory = workspace.path if workspace else None
+        media = []
+
+        if in_memory:
+            image = partial(Image.get_image_data, option['image_keywords'])
+            speech = partial(Google.speech_data, option['text'])
+        else:
+            image = partial(Image.get_image, option['image_keywords'], f"{filename}.jpg", directory)
+            speech = partial(Google.text_to_speech, option['text'], f"{filename}.wav", directory)
+
+        graph.add(f"{name}.image", image, deps=[dep])
+        media.append(f"{name}.image")
+
+        if option.get('text'):
+            graph.add(f"{name}.tts", speech, deps=[dep])
+            media.append(f"{name}.tts")
+
+        async def ready():
+            field = 'data' if in_memory else 'path'
+            option[f'image_{field}'] = graph.results[f"{name}.image"]
+            option[f'audio_{field}'] = graph.results.get(f"{name}.tts")
+            logger.info(f"Option {name} ready")
+
+        graph.add(f"{name}.ready", ready, deps=media)
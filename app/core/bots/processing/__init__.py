@@ -1,2 +1,4 @@
 from .scraper import Scraper
 from .editor import Editor
+from .graph import TaskGraph
+from .workspace import Workspace
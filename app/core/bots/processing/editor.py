@@ -7,6 +7,10 @@ class Editor:
         self.strategy = strategy
         logger.info(f"Initialized editor with strategy: {type(strategy).__name__}")
 
-    async def execute(self, account: str, content: list):
+    async def execute(self, account: str, content: list, options: dict = None):
         logger.info("Starting editor execute")
-        return await self.strategy.edit(account, content)
+        return await self.strategy.edit(account, content, options)
+
+    async def execute_stream(self, account: str, choices, options: dict = None):
+        logger.info("Starting editor execute on streamed content")
+        return await self.strategy.edit_stream(account, choices, options)
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger('uvicorn.error')
+
+class TaskGraph:
+    """
+    Small async task graph: every node starts as soon as all of its
+    dependencies have finished, and nodes can be added while the graph runs.
+    Per-node timings are recorded so the critical path can be reported.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, Tuple[float, float]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._deps: Dict[str, Tuple[str, ...]] = {}
+        self._origin = time.perf_counter()
+
+    def add(self, name: str, fn: Callable[[], Awaitable], deps: Iterable[str] = ()) -> asyncio.Task:
+        """
+        Schedule a node.
+        Args:
+            name: Unique node name
+            fn: Zero-argument coroutine function; dependency results are in `results`
+            deps: Names of nodes that must finish first
+        Returns:
+            The node's task
+        """
+        if name in self._tasks:
+            raise ValueError(f"Duplicate node {name} in graph {self.name}")
+        deps = tuple(deps)
+        missing = [dep for dep in deps if dep not in self._tasks]
+        if missing:
+            raise ValueError(f"Node {name} depends on unknown nodes: {missing}")
+
+        self._deps[name] = deps
+        self._tasks[name] = asyncio.create_task(self._run_node(name, fn, deps))
+        return self._tasks[name]
+
+    async def _run_node(self, name: str, fn: Callable[[], Awaitable], deps: Tuple[str, ...]) -> Any:
+        if deps:
+            await asyncio.gather(*(self._tasks[dep] for dep in deps))
+
+        start = time.perf_counter() - self._origin
+        try:
+            result = await fn()
+        finally:
+            self.timings[name] = (start, time.perf_counter() - self._origin)
+
+        self.results[name] = result
+        return result
+
+    async def wait(self):
+        """Wait for every node, including ones added meanwhile; on failure cancel the rest and raise."""
+        while True:
+            pending = [task for task in self._tasks.values() if not task.done()]
+            if not pending:
+                break
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_EXCEPTION)
+            failed = next((task for task in done if not task.cancelled() and task.exception()), None)
+            if failed is not None:
+                await self.cancel()
+                raise failed.exception()
+
+    async def cancel(self):
+        """Cancel every node that hasn't finished and wait for them to unwind."""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def critical_path(self) -> List[str]:
+        """Chain of nodes, following the last dependency to finish, that ends with the last node."""
+        if not self.timings:
+            return []
+
+        node = max(self.timings, key=lambda name: self.timings[name][1])
+        path = [node]
+        while self._deps.get(node):
+            node = max(self._deps[node], key=lambda name: self.timings.get(name, (0, 0))[1])
+            path.append(node)
+        return path[::-1]
+
+    def log_timings(self):
+        for name, (start, end) in sorted(self.timings.items(), key=lambda item: item[1]):
+            logger.debug(f"[{self.name}] {name}: {start:.2f}s -> {end:.2f}s ({end - start:.2f}s)")
+        path = self.critical_path()
+        if path:
+            total = self.timings[path[-1]][1]
+            logger.info(f"[{self.name}] critical path ({total:.2f}s): {' -> '.join(path)}")
@@ -7,7 +7,11 @@ class Scraper:
         self.strategy = strategy
         logger.info(f"Initialized scraper with strategy: {type(strategy).__name__}")
 
-    async def execute(self, config):
+    async def execute(self, config, workspace=None):
         logger.info("Starting scraping process")
-        content = await self.strategy.scrape(config)
+        content = await self.strategy.scrape(config, workspace)
         return content
+
+    def stream(self, config, workspace=None):
+        logger.info("Starting streamed scraping process")
+        return self.strategy.scrape_stream(config, workspace)
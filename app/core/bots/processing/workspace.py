@@ -0,0 +1,83 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger('uvicorn.error')
+
+class Workspace:
+    """
+    Private scratch directory for one pipeline run, so concurrent runs never
+    share media file names. It is removed when the run leaves the context,
+    whether it succeeded or not.
+
+    Backends:
+        disk: a directory under WORKSPACE_DIR
+        tmpfs: a directory in shared memory (/dev/shm), same file interface
+        memory: media bytes stay in the content itself and skip files entirely;
+            the directory only holds what still has to be a file
+    """
+
+    BACKENDS = ("disk", "tmpfs", "memory")
+    SHM_DIR = "/dev/shm"
+
+    def __init__(self, name: str, backend: Optional[str] = None, path: Optional[str] = None):
+        self.backend = backend or settings.WORKSPACE_BACKEND
+        if self.backend not in self.BACKENDS:
+            raise ValueError(f"Unknown workspace backend {self.backend}")
+
+        if path is None:
+            base = self.base_dir(self.backend)
+            os.makedirs(base, exist_ok=True)
+            path = tempfile.mkdtemp(prefix=f"{name}_", dir=base)
+        self.path = path
+
+    @classmethod
+    def base_dir(cls, backend: str) -> str:
+        if backend != "disk" and os.path.isdir(cls.SHM_DIR):
+            return os.path.join(cls.SHM_DIR, "darkbot")
+        return settings.WORKSPACE_DIR or os.path.join(tempfile.gettempdir(), "darkbot")
+
+    @classmethod
+    def attach(cls, path: str) -> "Workspace":
+        """Wrap a workspace created by an earlier pipeline stage."""
+        return cls(os.path.basename(path), "disk", path)
+
+    @property
+    def in_memory(self) -> bool:
+        return self.backend == "memory"
+
+    def file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        logger.debug(f"Workspace {self.path} removed")
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+    @classmethod
+    def sweep(cls, max_age: float):
+        """Remove workspaces left behind by runs that were killed before they could clean up."""
+        for backend in cls.BACKENDS:
+            base = cls.base_dir(backend)
+            try:
+                names = os.listdir(base)
+            except FileNotFoundError:
+                continue
+
+            for name in names:
+                path = os.path.join(base, name)
+                try:
+                    if time.time() - os.path.getmtime(path) > max_age:
+                        shutil.rmtree(path, ignore_errors=True)
+                        logger.info(f"Removed abandoned workspace {path}")
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,5 @@
+from .assets import AssetCache, asset_cache
+from .labels import LabelCache, label_cache
+from .disk import DiskCache
+from .tts import tts_cache
+from .images import image_cache, image_search_cache
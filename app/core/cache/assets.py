@@ -0,0 +1,85 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image as PILImage
+from app.core.render.audio import AUDIO_FPS, decode_audio
+from app.core.render.images import has_alpha
+
+logger = logging.getLogger('uvicorn.error')
+
+class AssetCache:
+    """
+    Worker-lifetime cache of decoded static assets (background frames and SFX PCM).
+    Each asset is decoded once and handed out as a read-only view; an entry is
+    reloaded when the underlying file's mtime or size changes.
+    """
+
+    AUDIO_FPS = AUDIO_FPS
+
+    def __init__(self):
+        self._entries: Dict[Tuple, Tuple[Tuple[int, int], np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _signature(path: str) -> Tuple[int, int]:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _freeze(array: np.ndarray) -> np.ndarray:
+        array.flags.writeable = False
+        return array
+
+    def _get(self, key: Tuple, path: str, loader) -> np.ndarray:
+        signature = self._signature(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != signature:
+                if entry is not None:
+                    logger.info(f"Asset changed on disk, reloading: {path}")
+                entry = (signature, self._freeze(loader(path)))
+                self._entries[key] = entry
+
+        # Views share the cached buffer, so handing them out costs nothing
+        return entry[1].view()
+
+    def image(self, path: str, size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        Get a decoded image, optionally pre-resized.
+        Args:
+            path: File path to the image
+            size: Target (width, height), or None to keep the original size
+        Returns:
+            Read-only uint8 RGB(A) array
+        """
+        def load(image_path: str) -> np.ndarray:
+            with PILImage.open(image_path) as img:
+                img = img.convert("RGBA" if has_alpha(img) else "RGB")
+                if size is not None and img.size != tuple(size):
+                    img = img.resize(tuple(size), PILImage.Resampling.LANCZOS)
+                return np.array(img)
+
+        return self._get(("image", path, size), path, load)
+
+    def audio(self, path: str) -> np.ndarray:
+        """
+        Get decoded PCM for an audio file.
+        Args:
+            path: File path to the audio file
+        Returns:
+            Read-only float32 stereo array of shape (samples, 2) at AUDIO_FPS
+        """
+        def load(audio_path: str) -> np.ndarray:
+            return decode_audio(audio_path, self.AUDIO_FPS)
+
+        return self._get(("audio", path), path, load)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+asset_cache = AssetCache()
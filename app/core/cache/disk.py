@@ -0,0 +1,199 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger('uvicorn.error')
+
+class DiskCache:
+    """
+    Content-addressed on-disk cache shared by every worker on the host.
+    Writes are atomic (temp file + rename), reads refresh the entry's mtime,
+    and the least recently used entries are evicted once the cache outgrows
+    `max_bytes`. A cache without a directory is disabled and always misses.
+    """
+
+    # Evict down to this fraction of max_bytes, so eviction doesn't run on every write
+    LOW_WATER = 0.9
+    # Entries being written, renamed into place once complete; one older than
+    # TMP_MAX_AGE was left behind by a writer that died
+    TMP_PREFIX = ".tmp-"
+    TMP_MAX_AGE = 60 * 60
+
+    def __init__(self, name: str, directory: Optional[str], max_bytes: int, suffix: str = ""):
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._size: Optional[int] = None
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.directory)
+
+    @staticmethod
+    def key(*parts) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}{self.suffix}")
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up an entry and mark it as recently used.
+        Returns:
+            Path of the cached file, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        return path
+
+    def contains(self, key: str) -> bool:
+        """Whether an entry is cached, without counting a lookup or refreshing it."""
+        return self.enabled and os.path.exists(self.path_for(key))
+
+    def read(self, key: str) -> Optional[bytes]:
+        """
+        Read an entry's contents and mark it as recently used.
+        Returns:
+            The cached bytes, or None on a miss
+        """
+        path = self.get(key)
+        if path is None:
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes) -> Optional[str]:
+        """
+        Atomically store an entry; concurrent writers of the same key are safe.
+        Returns:
+            Path of the cached file, or None if the cache is disabled
+        """
+        if not self.enabled:
+            return None
+
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=self.TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is not None:
+                self._size += len(data) - replaced
+            over = self._size is None or self._size > self.max_bytes
+        if over:
+            self.evict()
+        return path
+
+    def materialize(self, key: str, destination: str) -> bool:
+        """
+        Hard-link (or copy, across filesystems) a cached entry to `destination`.
+        Returns:
+            False on a miss, including entries evicted concurrently
+        """
+        path = self.get(key)
+        if path is None:
+            return False
+
+        try:
+            if os.path.exists(destination):
+                os.remove(destination)
+            try:
+                os.link(path, destination)
+            except OSError:
+                shutil.copyfile(path, destination)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def evict(self):
+        """Delete least recently used entries until the cache is under its low-water mark."""
+        if not self.enabled or not self._evict_lock.acquire(blocking=False):
+            return
+
+        try:
+            entries = []
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue
+                    # Another writer's entry in progress; its rename would fail if removed
+                    if name.startswith(self.TMP_PREFIX) and time.time() - stat.st_mtime < self.TMP_MAX_AGE:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+
+            size = sum(entry[1] for entry in entries)
+            if size > self.max_bytes:
+                target = self.max_bytes * self.LOW_WATER
+                removed = 0
+                for _, entry_size, path in sorted(entries):
+                    if size <= target:
+                        break
+                    try:
+                        os.remove(path)
+                        size -= entry_size
+                        removed += 1
+                    except FileNotFoundError:
+                        continue
+                logger.info(f"Evicted {removed} entries from {self.name} cache ({size} bytes left)")
+
+            with self._lock:
+                self._size = size
+        finally:
+            self._evict_lock.release()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'bytes': self._size,
+            }
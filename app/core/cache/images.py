@@ -0,0 +1,21 @@
+import os
+from app.config import settings
+from .disk import DiskCache
+
+def _subdirectory(name: str):
+    return os.path.join(settings.IMAGE_CACHE_DIR, name) if settings.IMAGE_CACHE_DIR else None
+
+# Search candidates per (provider, query); freshness is checked by the caller
+image_search_cache = DiskCache(
+    "image-search",
+    _subdirectory("search"),
+    64 * 1024 * 1024,
+    suffix=".json"
+)
+
+# Downloaded image bytes keyed by source URL
+image_cache = DiskCache(
+    "image",
+    _subdirectory("files"),
+    settings.IMAGE_CACHE_MAX_BYTES
+)
@@ -0,0 +1,99 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+from moviepy import TextClip
+from app.config import settings
+
+logger = logging.getLogger('uvicorn.error')
+
+class LabelCache:
+    """
+    Bounded LRU cache of rasterized TextClip bitmaps (RGB plus mask).
+    Keys cover every style argument, the text and the font file's identity,
+    so a cached label is pixel-identical to a freshly rendered TextClip.
+    Warmed entries are pinned and never evicted.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._pinned: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(style: Dict) -> Tuple:
+        def freeze(value):
+            return tuple(value) if isinstance(value, (list, tuple)) else value
+
+        font = style.get('font')
+        font_stat = os.stat(font) if font else None
+        font_id = (font_stat.st_mtime_ns, font_stat.st_size) if font_stat else None
+        return tuple(sorted((k, freeze(v)) for k, v in style.items())) + (font_id,)
+
+    @staticmethod
+    def _render(style: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        clip = TextClip(**style)
+        try:
+            rgb = np.ascontiguousarray(clip.get_frame(0))
+            mask = np.ascontiguousarray(clip.mask.get_frame(0), dtype=np.float32)
+        finally:
+            clip.close()
+
+        rgb.flags.writeable = False
+        mask.flags.writeable = False
+        return rgb, mask
+
+    def get(self, style: Dict, pin: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the rasterized label for a TextClip style, rendering it on a miss.
+        Args:
+            style: Keyword arguments for TextClip
+            pin: Keep the entry for the lifetime of the cache
+        Returns:
+            Read-only (rgb, mask) arrays
+        """
+        key = self._key(style)
+
+        with self._lock:
+            entry = self._pinned.get(key) or self._entries.get(key)
+            if entry is not None:
+                self._hits += 1
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                return entry
+            self._misses += 1
+
+        # Rasterize outside the lock; a concurrent miss on the same key just renders twice
+        entry = self._render(style)
+
+        with self._lock:
+            if pin:
+                self._pinned[key] = entry
+            elif key not in self._entries:
+                self._entries[key] = entry
+                self._size += entry[0].nbytes + entry[1].nbytes
+                while self._size > self.max_bytes and len(self._entries) > 1:
+                    _, (rgb, mask) = self._entries.popitem(last=False)
+                    self._size -= rgb.nbytes + mask.nbytes
+        return entry
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'pinned': len(self._pinned),
+                'bytes': self._size,
+            }
+
+label_cache = LabelCache(settings.LABEL_CACHE_MAX_BYTES)
@@ -0,0 +1,10 @@
+from app.config import settings
+from .disk import DiskCache
+
+# LINEAR16 synthesis results keyed by text, voice, language and encoding
+tts_cache = DiskCache(
+    "tts",
+    settings.TTS_CACHE_DIR,
+    settings.TTS_CACHE_MAX_BYTES,
+    suffix=".wav"
+)
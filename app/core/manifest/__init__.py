@@ -0,0 +1 @@
+from .videos import VideoManifest, video_manifest
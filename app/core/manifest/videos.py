@@ -0,0 +1,229 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from app.config import settings
+
+logger = logging.getLogger('uvicorn.error')
+
+class VideoManifest:
+    """
+    SQLite index of rendered videos, keyed by account, shared by the render and
+    upload workers on a host. A video moves from rendered to uploading when an
+    upload claims it, then to uploaded, or back to rendered if the upload fails.
+    Claims are atomic, so two uploaders never pick the same video.
+
+    When the manifest is first created, videos already in `video_dir` are
+    registered, wherever the manifest file itself lives.
+    """
+
+    RENDERED = "rendered"
+    UPLOADING = "uploading"
+    UPLOADED = "uploaded"
+
+    # Videos named by the editor before the manifest existed: {account}_{timestamp}.mp4
+    LEGACY_NAME = re.compile(r"^(?P<account>.+)_(?P<timestamp>\d+)\.mp4$")
+
+    def __init__(self, path: str, claim_timeout: float, video_dir: Optional[str] = None):
+        self.path = path
+        self.claim_timeout = claim_timeout
+        self.video_dir = video_dir
+        self._local = threading.local()
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+
+        with self._init_lock:
+            if not self._initialized:
+                exists = connection.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'videos'"
+                ).fetchone()
+                connection.executescript("""
+                    CREATE TABLE IF NOT EXISTS videos (
+                        id INTEGER PRIMARY KEY,
+                        account TEXT NOT NULL,
+                        path TEXT NOT NULL UNIQUE,
+                        status TEXT NOT NULL,
+                        error TEXT,
+                        created_at REAL NOT NULL,
+                        updated_at REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS videos_account_status ON videos (account, status);
+                """)
+                self._migrate(connection)
+                self._initialized = True
+                if not exists and self.video_dir:
+                    self._backfill(connection, self.video_dir)
+        return connection
+
+    # Columns added after the table was first created, with their types
+    RENDER_COLUMNS = {
+        "profile": "TEXT",
+        "render_seconds": "REAL",
+        "duration": "REAL",
+        "size": "INTEGER",
+    }
+
+    def _migrate(self, connection: sqlite3.Connection):
+        """Add columns missing from manifests created by earlier versions."""
+        existing = {row["name"] for row in connection.execute("PRAGMA table_info(videos)")}
+        with connection:
+            for column, kind in self.RENDER_COLUMNS.items():
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE videos ADD COLUMN {column} {kind}")
+
+    def _backfill(self, connection: sqlite3.Connection, directory: str):
+        """Register videos rendered before the manifest existed."""
+        if not os.path.isdir(directory):
+            return
+
+        rows = []
+        for name in os.listdir(directory):
+            match = self.LEGACY_NAME.match(name)
+            if match:
+                path = os.path.abspath(os.path.join(directory, name))
+                created_at = float(match.group("timestamp"))
+                rows.append((match.group("account"), path, self.RENDERED, created_at, created_at))
+
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO videos (account, path, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        if rows:
+            logger.info(f"Video manifest: registered {len(rows)} existing videos")
+
+    def add(
+            self,
+            account: str,
+            path: str,
+            profile: Optional[str] = None,
+            render_seconds: Optional[float] = None,
+            duration: Optional[float] = None,
+            size: Optional[int] = None
+        ):
+        """
+        Record a freshly rendered video.
+        Args:
+            account: Account the video belongs to
+            path: Video file
+            profile: Encoder profile it was rendered with
+            render_seconds: Time render processes spent on the video
+            duration: Length of the video in seconds
+            size: File size in bytes
+        """
+        now = time.time()
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO videos (account, path, status, profile, render_seconds, duration, size, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET status = excluded.status, error = NULL, profile = excluded.profile, "
+                "render_seconds = excluded.render_seconds, duration = excluded.duration, size = excluded.size, "
+                "updated_at = excluded.updated_at",
+                (account, os.path.abspath(path), self.RENDERED, profile, render_seconds, duration, size, now, now)
+            )
+
+    def _claim(self, condition: str, params: List) -> List[Dict]:
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Uploads that never reported back (worker killed) become claimable again
+            rows = connection.execute(
+                f"SELECT * FROM videos WHERE {condition} AND (status = ? OR (status = ? AND updated_at < ?)) "
+                "ORDER BY created_at",
+                [*params, self.RENDERED, self.UPLOADING, now - self.claim_timeout]
+            ).fetchall()
+            connection.executemany(
+                "UPDATE videos SET status = ?, updated_at = ? WHERE id = ?",
+                [(self.UPLOADING, now, row["id"]) for row in rows]
+            )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return [dict(row) for row in rows]
+
+    def claim_accounts(self, accounts: Iterable[str]) -> List[Dict]:
+        """
+        Claim every video of the given accounts that is waiting for upload.
+        Returns:
+            Claimed videos, oldest first
+        """
+        accounts = list(accounts)
+        if not accounts:
+            return []
+        placeholders = ", ".join("?" for _ in accounts)
+        return self._claim(f"account IN ({placeholders})", accounts)
+
+    def claim_paths(self, paths: Iterable[str]) -> List[Dict]:
+        """Claim specific videos, e.g. the one a render just finished."""
+        paths = [os.path.abspath(path) for path in paths]
+        if not paths:
+            return []
+        placeholders = ", ".join("?" for _ in paths)
+        return self._claim(f"path IN ({placeholders})", paths)
+
+    def _set_status(self, paths: Iterable[str], status: str, error: Optional[str] = None):
+        now = time.time()
+        with self._connection() as connection:
+            connection.executemany(
+                "UPDATE videos SET status = ?, error = ?, updated_at = ? WHERE path = ?",
+                [(status, error, now, os.path.abspath(path)) for path in paths]
+            )
+
+    def uploaded(self, paths: Iterable[str]):
+        self._set_status(paths, self.UPLOADED)
+
+    def release(self, paths: Iterable[str], error: Optional[str] = None):
+        """Hand claimed videos back after a failed upload, so a later upload retries them."""
+        self._set_status(paths, self.RENDERED, error)
+
+    def videos(self, account: str, status: Optional[str] = None) -> List[Dict]:
+        query = "SELECT * FROM videos WHERE account = ?"
+        params = [account]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        return [dict(row) for row in self._connection().execute(query + " ORDER BY created_at", params)]
+
+    def profile_stats(self) -> List[Dict]:
+        """
+        What each encoder profile has cost and produced so far.
+        Returns:
+            One dictionary per profile containing:
+            - profile: profile name
+            - videos: number of videos rendered with it
+            - speed: seconds of video rendered per second of render process time
+            - bytes_per_second: output size per second of video
+        """
+        rows = self._connection().execute("""
+            SELECT profile, COUNT(*) AS videos,
+                   SUM(duration) / SUM(render_seconds) AS speed,
+                   SUM(size) / SUM(duration) AS bytes_per_second
+            FROM videos
+            WHERE profile IS NOT NULL AND render_seconds > 0 AND duration > 0
+            GROUP BY profile
+            ORDER BY profile
+        """)
+        return [dict(row) for row in rows]
+
+video_manifest = VideoManifest(
+    settings.VIDEO_MANIFEST_PATH or os.path.join(settings.VIDEOS_TMP_DIR, "videos.sqlite3"),
+    settings.UPLOAD_CLAIM_TIMEOUT,
+    settings.VIDEOS_TMP_DIR
+)
@@ -0,0 +1,8 @@
+from .ffmpeg import run_ffmpeg, concat_segments
+from .executor import RenderExecutor, render_executor
+from .audio import AUDIO_FPS, AudioTrack, carry_over, decode_audio, duration_of, mixdown, to_audio_clip
+from .images import ALPHA_MODES, has_alpha
+from .timeline import AudioCue, Layer, TimelineClip
+from .filtergraph import render_filtergraph
+from .stream import stream_segments
+from .profiles import ENCODER_PROFILES, EncoderProfile, encoder_profile
@@ -0,0 +1,122 @@
+import io
+import wave
+from typing import List, Tuple, Union
+
+import numpy as np
+from moviepy import AudioArrayClip, AudioFileClip
+
+AUDIO_FPS = 44100
+DECODE_CHUNK_SIZE = 2000
+
+class AudioTrack:
+    """A PCM buffer placed on the timeline at `start` seconds with a linear gain."""
+
+    def __init__(self, pcm: np.ndarray, start: float = 0.0, gain: float = 1.0):
+        self.pcm = pcm
+        self.start = start
+        self.gain = gain
+
+    def shifted(self, offset: float) -> "AudioTrack":
+        return AudioTrack(self.pcm, self.start + offset, self.gain)
+
+def _to_stereo(pcm: np.ndarray) -> np.ndarray:
+    if pcm.ndim == 1:
+        pcm = pcm[:, np.newaxis]
+    if pcm.shape[1] == 1:
+        pcm = np.repeat(pcm, 2, axis=1)
+    return np.ascontiguousarray(pcm[:, :2], dtype=np.float32)
+
+def _resample(pcm: np.ndarray, src_fps: int, fps: int) -> np.ndarray:
+    if src_fps == fps or len(pcm) == 0:
+        return pcm
+    length = int(round(len(pcm) * fps / src_fps))
+    src_t = np.arange(len(pcm)) / src_fps
+    dst_t = np.arange(length) / fps
+    return np.column_stack([np.interp(dst_t, src_t, pcm[:, ch]) for ch in range(pcm.shape[1])])
+
+def _decode_wav(source, fps: int) -> np.ndarray:
+    with wave.open(source, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise wave.Error(f"Unsupported sample width: {wav.getsampwidth()}")
+        channels = wav.getnchannels()
+        src_fps = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    pcm = np.frombuffer(frames, dtype="<i2").reshape(-1, channels) / 32768.0
+    return _resample(pcm, src_fps, fps)
+
+def decode_audio(path: Union[str, bytes], fps: int = AUDIO_FPS) -> np.ndarray:
+    """
+    Decode an audio file to PCM. 16-bit WAV (e.g. LINEAR16 TTS output) is read
+    directly; anything else goes through an ffmpeg reader.
+    Args:
+        path: File path to the audio file, or in-memory 16-bit WAV bytes
+        fps: Target sample rate
+    Returns:
+        float32 stereo array of shape (samples, 2)
+    """
+    if isinstance(path, bytes):
+        return _to_stereo(_decode_wav(io.BytesIO(path), fps))
+
+    try:
+        return _to_stereo(_decode_wav(path, fps))
+    except (wave.Error, EOFError):
+        pass
+
+    clip = AudioFileClip(path, fps=fps)
+    try:
+        # Small chunks sidestep the reader's whole-file buffering path
+        pcm = np.vstack(list(clip.iter_chunks(fps=fps, chunksize=DECODE_CHUNK_SIZE)))
+    finally:
+        clip.close()
+    return _to_stereo(pcm)
+
+def duration_of(pcm: np.ndarray, fps: int = AUDIO_FPS) -> float:
+    return len(pcm) / fps
+
+def mixdown(tracks: List[AudioTrack], duration: float, fps: int = AUDIO_FPS) -> np.ndarray:
+    """
+    Mix tracks into one preallocated stereo buffer in a single pass.
+    Tracks are summed without normalization, as CompositeAudioClip does, and
+    anything outside [0, duration) is cut.
+    Args:
+        tracks: Tracks to mix
+        duration: Length of the output in seconds
+        fps: Sample rate shared by all tracks
+    Returns:
+        float32 stereo array of shape (samples, 2)
+    """
+    length = int(round(duration * fps))
+    buffer = np.zeros((length, 2), dtype=np.float32)
+
+    for track in tracks:
+        offset = int(round(track.start * fps))
+        pcm = track.pcm
+        if offset < 0:
+            pcm, offset = pcm[-offset:], 0
+        pcm = pcm[:max(0, length - offset)]
+        if len(pcm):
+            buffer[offset:offset + len(pcm)] += pcm * np.float32(track.gain)
+
+    return buffer
+
+def carry_over(pcm: np.ndarray, carry: np.ndarray, length: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mix the sound carried over from earlier segments into a segment's audio
+    and cut it to the segment, as if the whole timeline had been mixed at once.
+    Args:
+        pcm: The segment's audio, which may run past its end
+        carry: Audio of earlier segments that ran past their end
+        length: Length of the segment in samples
+    Returns:
+        The segment's audio, exactly `length` samples long, and what runs past it
+    """
+    mixed = np.zeros((max(length, len(pcm), len(carry)), 2), dtype=np.float32)
+    mixed[:len(pcm)] += pcm
+    mixed[:len(carry)] += carry
+    return mixed[:length], mixed[length:]
+
+def to_audio_clip(pcm: np.ndarray, fps: int = AUDIO_FPS) -> AudioArrayClip:
+    """Wrap a PCM buffer for the encoder."""
+    # AudioArrayClip leaves `end` unset, which composites need
+    return AudioArrayClip(pcm, fps=fps).with_duration(duration_of(pcm, fps))
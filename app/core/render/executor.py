@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger('uvicorn.error')
+
+def _run_initializers(initializers: List[Callable]):
+    for fn in initializers:
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"Render worker initializer {fn} failed: {str(e)}")
+
+def _timed(fn: Callable, *args) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+class RenderExecutor:
+    """
+    Worker-wide process pool for CPU-bound rendering and encoding.
+    Coroutines await renders through `run`, so the event loop keeps serving
+    I/O-bound work (scraping, uploads) while frames are composited and encoded.
+    """
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._initializers: List[Callable] = []
+        self._lock = threading.Lock()
+
+    @property
+    def cpus(self) -> int:
+        """This worker process's share of the host's CPUs, since every dramatiq process has its own pool."""
+        return max(1, (os.cpu_count() or 1) // max(1, settings.WORKER_PROCESSES))
+
+    @property
+    def workers(self) -> int:
+        """Number of concurrent render processes."""
+        return settings.RENDER_WORKERS or self.cpus
+
+    @property
+    def encode_threads(self) -> int:
+        """Encoder threads per render, sized so all workers together fill this process's CPUs."""
+        return settings.RENDER_THREADS or max(1, self.cpus // self.workers)
+
+    def register_initializer(self, fn: Callable):
+        """
+        Register a picklable callable to run once in every render process at start,
+        e.g. to warm worker-lifetime caches. Only affects pools started afterwards.
+        """
+        with self._lock:
+            if fn not in self._initializers:
+                self._initializers.append(fn)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                logger.info(
+                    f"Starting render executor: {self.workers} workers, "
+                    f"{self.encode_threads} encoder threads each"
+                )
+                # Spawned rather than forked, since dramatiq workers are threaded
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_run_initializers,
+                    initargs=(list(self._initializers),)
+                )
+            return self._pool
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run a picklable callable in a render process and await its result.
+        Args:
+            fn: Module-level function or bound method of a picklable object
+            args: Positional arguments for fn
+        Returns:
+            Whatever fn returns
+        """
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            self._discard(pool)
+            raise
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        """Drop a pool whose process died, so the next render starts a fresh one."""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+        logger.error("A render process died; the render executor will restart its pool")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    async def run_timed(self, fn: Callable, *args) -> Tuple[Any, float]:
+        """
+        Like `run`, also measuring how long fn ran in its render process,
+        leaving out the time it waited for a free one.
+        Returns:
+            Whatever fn returns, and its run time in seconds
+        """
+        return await self.run(_timed, fn, *args)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
+
+render_executor = RenderExecutor()
@@ -0,0 +1,67 @@
+import logging
+import os
+import subprocess
+from typing import List, Optional
+
+from moviepy.config import FFMPEG_BINARY
+
+logger = logging.getLogger('uvicorn.error')
+
+def run_ffmpeg(args: List[str]):
+    """
+    Run ffmpeg with the binary moviepy is configured to use.
+    Args:
+        args: Command line arguments after the binary
+    Raises:
+        RuntimeError: If ffmpeg exits with a non-zero status
+    """
+    cmd = [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y", *args]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg failed ({result.returncode}): {result.stderr.decode(errors='replace').strip()}"
+        )
+
+def concat_segments(
+        segment_paths: List[str],
+        output_path: str,
+        music_path: Optional[str] = None,
+        music_volume: float = 1.0,
+        audio_codec: str = "aac"
+    ) -> str:
+    """
+    Join independently encoded segments with the concat demuxer.
+    The video stream is copied as-is; only the audio is encoded, optionally
+    mixed with a music bed that is cut to the length of the video.
+    Args:
+        segment_paths: Segment files sharing identical codec parameters, in order
+        output_path: Destination file
+        music_path: Optional background music file
+        music_volume: Gain applied to the background music
+        audio_codec: Codec for the final audio stream
+    Returns:
+        The output path
+    """
+    list_path = f"{os.path.splitext(output_path)[0]}.concat.txt"
+    with open(list_path, "w") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+
+    args = ["-f", "concat", "-safe", "0", "-i", list_path]
+    if music_path:
+        args += [
+            "-i", music_path,
+            "-filter_complex",
+            f"[1:a]volume={music_volume}[bg];[0:a][bg]amix=inputs=2:duration=first:normalize=0[a]",
+            "-map", "0:v", "-map", "[a]",
+        ]
+    args += ["-c:v", "copy", "-c:a", audio_codec, output_path]
+
+    try:
+        run_ffmpeg(args)
+    finally:
+        os.remove(list_path)
+
+    logger.info(f"Concatenated {len(segment_paths)} segments into {output_path}")
+    return output_path
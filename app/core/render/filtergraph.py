@@ -0,0 +1,149 @@
+import logging
+import os
+import tempfile
+import wave
+from typing import Dict, List, Union
+
+import numpy as np
+from PIL import Image as PILImage
+from .audio import AUDIO_FPS
+from .ffmpeg import run_ffmpeg
+from .timeline import AudioCue, Layer
+
+logger = logging.getLogger('uvicorn.error')
+
+def _number(value: float) -> str:
+    return f"{value:.6f}".rstrip("0").rstrip(".")
+
+def _coordinate(layer: Layer, axis: int) -> str:
+    """Overlay expression for one axis of a layer's position at output time t."""
+    origin, target = layer.origin[axis], layer.target[axis]
+    if not layer.moves or origin == target:
+        return _number(origin)
+    progress = f"min(1,(t-{_number(layer.start)})/{_number(layer.move)})"
+    return f"'{_number(origin)}+({_number(target - origin)})*{progress}'"
+
+def _upmix(path: str) -> str:
+    """
+    Filter duplicating the channel of a mono 16-bit WAV, as decode_audio does;
+    ffmpeg's own upmix would mix it into both channels at -3 dB.
+    """
+    try:
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() == 2 and wav.getnchannels() == 1:
+                return "pan=stereo|c0=c0|c1=c0,"
+    except (wave.Error, EOFError):
+        pass
+    return ""
+
+def _write_image(image: np.ndarray, path: str):
+    # Compression only costs time here, the file is read once by ffmpeg
+    PILImage.fromarray(image).save(path, compress_level=1)
+
+def render_filtergraph(
+        background: np.ndarray,
+        layers: List[Layer],
+        cues: List[AudioCue],
+        sources: Dict[str, Union[str, bytes]],
+        duration: float,
+        output_path: str,
+        fps: int,
+        encoder_args: List[str],
+        audio_codec: str = "aac"
+    ) -> str:
+    """
+    Render a layer timeline in a single native ffmpeg process: every layer is an
+    overlay with time expressions for its slide and a fade filter for its
+    fade-in, and every sound is delayed and mixed with adelay/amix.
+    Args:
+        background: Full-frame RGB image under every layer
+        layers: Layers in stacking order, bottom first
+        cues: Sounds on the timeline
+        sources: Audio file path or in-memory file bytes for each cue source
+        duration: Length of the output in seconds
+        output_path: Destination video file
+        fps: Output frame rate
+        encoder_args: Video encoder arguments, e.g. ["-c:v", "libx264"]
+        audio_codec: Codec for the audio stream
+    Returns:
+        The output path
+    """
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or None) as directory:
+        args: List[str] = []
+        graph: List[str] = []
+        inputs: List[str] = []
+
+        def add_input(path: str, *options: str) -> int:
+            args.extend([*options, "-i", path])
+            inputs.append(path)
+            return len(inputs) - 1
+
+        background_path = os.path.join(directory, "background.png")
+        _write_image(background, background_path)
+        index = add_input(background_path, "-framerate", str(fps))
+        graph.append(f"[{index}:v]loop=loop=-1:size=1,trim=duration={_number(duration)},format=rgb24[v0]")
+
+        # Layers sharing an image (e.g. slide in and slide out) share its file
+        images: Dict[int, str] = {}
+        for n, layer in enumerate(layers, 1):
+            path = images.get(id(layer.image))
+            if path is None:
+                path = images[id(layer.image)] = os.path.join(directory, f"layer_{n:03d}.png")
+                _write_image(layer.image, path)
+
+            # A still layer is a single frame that overlay repeats; only a fade
+            # needs frames of its own, and only until it is fully opaque
+            if layer.fade:
+                index = add_input(path, "-framerate", str(fps))
+                fade_end = layer.start + layer.fade + 1 / fps
+                graph.append(
+                    f"[{index}:v]loop=loop=-1:size=1,trim=start={_number(layer.start)}:end={_number(fade_end)},"
+                    f"format=rgba,fade=t=in:st={_number(layer.start)}:d={_number(layer.fade)}:alpha=1[l{n}]"
+                )
+            else:
+                index = add_input(path)
+                graph.append(f"[{index}:v]format=rgba[l{n}]")
+
+            graph.append(
+                f"[v{n - 1}][l{n}]overlay=x={_coordinate(layer, 0)}:y={_coordinate(layer, 1)}"
+                f":enable='gte(t,{_number(layer.start)})*lt(t,{_number(layer.end)})'"
+                f":eval=frame:format=rgb[v{n}]"
+            )
+        graph.append(f"[v{len(layers)}]format=yuv420p[v]")
+
+        # A silent bed fixes the mix to the video's length, cutting and padding every sound
+        graph.append(f"anullsrc=r={AUDIO_FPS}:cl=stereo,atrim=duration={_number(duration)}[bed]")
+        mixed = ["[bed]"]
+        for n, cue in enumerate(cues):
+            source = sources[cue.source]
+            if isinstance(source, bytes):
+                path = os.path.join(directory, f"audio_{n:03d}")
+                with open(path, "wb") as f:
+                    f.write(source)
+                source = path
+            index = add_input(source)
+
+            trim = f"atrim=start={_number(cue.skip)}"
+            if cue.length is not None:
+                trim += f":duration={_number(cue.length)}"
+            delay = int(round(cue.start * AUDIO_FPS))
+            graph.append(
+                f"[{index}:a]{trim},asetpts=PTS-STARTPTS,{_upmix(source)}"
+                f"aformat=sample_fmts=fltp:sample_rates={AUDIO_FPS}:channel_layouts=stereo,"
+                f"volume={_number(cue.gain)},adelay={delay}S:all=1[a{n}]"
+            )
+            mixed.append(f"[a{n}]")
+        graph.append(f"{''.join(mixed)}amix=inputs={len(mixed)}:duration=first:normalize=0[a]")
+
+        args += [
+            "-filter_complex", ";".join(graph),
+            "-map", "[v]", "-map", "[a]",
+            "-r", str(fps),
+            *encoder_args,
+            "-c:a", audio_codec,
+            output_path
+        ]
+        run_ffmpeg(args)
+
+    logger.info(f"Rendered {len(layers)} layers and {len(cues)} sounds into {output_path} with ffmpeg")
+    return output_path
@@ -0,0 +1,8 @@
+from PIL import Image as PILImage
+
+# Modes with an alpha channel; other images may still mark a transparent colour
+ALPHA_MODES = ("RGBA", "LA", "PA")
+
+def has_alpha(img: PILImage.Image) -> bool:
+    """Whether an image has any transparency, so it must be converted to RGBA rather than RGB."""
+    return img.mode in ALPHA_MODES or "transparency" in img.info
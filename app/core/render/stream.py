@@ -0,0 +1,190 @@
+import logging
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import wave
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from moviepy import VideoClip
+from moviepy.config import FFMPEG_BINARY
+from .audio import AUDIO_FPS, carry_over
+from .ffmpeg import run_ffmpeg
+
+logger = logging.getLogger('uvicorn.error')
+
+class _FrameWriter(threading.Thread):
+    """
+    Feeds frames into an encoder's stdin from another thread, so that
+    compositing the next frames overlaps with the encoder consuming the last.
+    Frames are copied into a fixed pool of `queue_size` buffers that are
+    recycled once written: the producer blocks while all are in flight, and
+    memory stays bounded however long the video is.
+    After a write fails it keeps recycling buffers, so the producer never
+    blocks on a dead encoder; the error surfaces on the next `put`.
+    """
+
+    def __init__(self, pipe, queue_size: int):
+        super().__init__(daemon=True)
+        self.pipe = pipe
+        self.frames: queue.Queue = queue.Queue()
+        self.free: queue.Queue = queue.Queue()
+        self.unallocated = max(1, queue_size)
+        self.error: Optional[Exception] = None
+
+    def run(self):
+        while True:
+            buffer = self.frames.get()
+            if buffer is None:
+                break
+            if self.error is None:
+                try:
+                    self.pipe.write(buffer)
+                except Exception as e:
+                    self.error = e
+            self.free.put(buffer)
+
+    def put(self, frame: np.ndarray):
+        self.raise_error()
+        if self.unallocated:
+            self.unallocated -= 1
+            buffer = np.empty_like(frame)
+        else:
+            buffer = self.free.get()
+        # Copied, since clips may reuse their frame buffer
+        np.copyto(buffer, frame)
+        self.frames.put(buffer)
+
+    def finish(self):
+        self.frames.put(None)
+        self.join()
+
+    def raise_error(self):
+        if self.error is not None:
+            raise RuntimeError(f"Encoder stopped accepting frames: {str(self.error)}") from self.error
+
+def _close_encoder(writer: _FrameWriter, encoder: subprocess.Popen):
+    writer.finish()
+    try:
+        encoder.stdin.close()
+    except BrokenPipeError:
+        pass
+    encoder.wait()
+
+def _to_pcm16(pcm: np.ndarray) -> bytes:
+    return (np.clip(pcm, -1, 1) * 32767).astype("<i2").tobytes()
+
+def stream_segments(
+        segments: Iterator[Tuple[VideoClip, np.ndarray]],
+        output_path: str,
+        size: Tuple[int, int],
+        fps: int,
+        encoder_args: List[str],
+        music_path: Optional[str] = None,
+        music_volume: float = 1.0,
+        audio_codec: str = "aac",
+        queue_size: int = 8
+    ) -> str:
+    """
+    Encode segments one after the other as they are produced, without ever
+    holding more than one of them. Frames are piped straight into an ffmpeg
+    process through a bounded queue and each segment's audio is appended to a
+    WAV file; both are muxed with the optional music bed at the end.
+
+    A segment's audio may run past its video: the overflow is mixed into the
+    start of the next segment, as if the whole timeline had been mixed at once.
+
+    Every segment is closed as soon as its frames are queued, and the
+    generator is closed if anything fails, so that it can release its own
+    resources too.
+    Args:
+        segments: (clip, PCM) pairs, typically from a generator
+        output_path: Destination video file
+        size: Frame (width, height) shared by all clips
+        fps: Output frame rate
+        encoder_args: Video encoder arguments, e.g. ["-c:v", "libx264"]
+        music_path: Optional background music file, cut to the video's length
+        music_volume: Gain applied to the background music
+        audio_codec: Codec for the audio stream
+        queue_size: Frame buffers between compositing and the encoder
+    Returns:
+        The output path
+    """
+    width, height = size
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(output_path) or None) as directory:
+        video_path = os.path.join(directory, "video.mkv")
+        audio_path = os.path.join(directory, "audio.wav")
+        log_path = os.path.join(directory, "ffmpeg.log")
+
+        with open(log_path, "wb") as log, wave.open(audio_path, "wb") as audio:
+            audio.setnchannels(2)
+            audio.setsampwidth(2)
+            audio.setframerate(AUDIO_FPS)
+
+            encoder = subprocess.Popen(
+                [
+                    FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+                    "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+                    "-i", "-", "-an", *encoder_args, video_path
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=log
+            )
+            writer = _FrameWriter(encoder.stdin, queue_size)
+            writer.start()
+
+            count = 0
+            start = 0.0
+            frames = samples = 0
+            carry = np.zeros((0, 2), dtype=np.float32)
+            try:
+                for clip, pcm in segments:
+                    try:
+                        # Frames and samples follow the output's grid rather than each
+                        # segment's, so segment boundaries don't accumulate rounding
+                        end = start + clip.duration
+                        while frames / fps < end:
+                            writer.put(clip.get_frame(frames / fps - start))
+                            frames += 1
+
+                        length = int(round(end * AUDIO_FPS)) - samples
+                        mixed, carry = carry_over(pcm, carry, length)
+                        audio.writeframes(_to_pcm16(mixed))
+                        samples += length
+                        start = end
+                    finally:
+                        clip.close()
+                    del clip, pcm
+                    count += 1
+            except BaseException:
+                if hasattr(segments, "close"):
+                    segments.close()
+                if writer.error is None:
+                    # Failed on our side rather than the encoder's, which is stopped
+                    encoder.kill()
+                    _close_encoder(writer, encoder)
+                    raise
+
+            _close_encoder(writer, encoder)
+
+        if writer.error is not None or encoder.returncode != 0:
+            with open(log_path, "rb") as log:
+                message = log.read().decode(errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed ({encoder.returncode}): {message or str(writer.error)}")
+
+        args = ["-i", video_path, "-i", audio_path]
+        if music_path:
+            args += [
+                "-i", music_path,
+                "-filter_complex",
+                f"[2:a]volume={music_volume}[bg];[1:a][bg]amix=inputs=2:duration=first:normalize=0[a]",
+                "-map", "0:v", "-map", "[a]",
+            ]
+        args += ["-c:v", "copy", "-c:a", audio_codec, output_path]
+        run_ffmpeg(args)
+
+    logger.info(f"Streamed {count} segments into {output_path}")
+    return output_path
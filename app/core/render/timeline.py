@@ -0,0 +1,226 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+from moviepy import VideoClip
+
+Point = Tuple[float, float]
+Rect = Tuple[int, int, int, int]
+
+class Layer:
+    """
+    A still image placed on an output timeline, described declaratively so any
+    render backend can draw it. It is shown for [start, end), moves linearly
+    from `origin` to `target` during the first `move` seconds and, with `fade`,
+    fades in over that many seconds from `start`.
+    """
+
+    def __init__(
+            self,
+            image: np.ndarray,
+            start: float,
+            end: float,
+            origin: Point,
+            target: Optional[Point] = None,
+            move: float = 0.0,
+            fade: float = 0.0
+        ):
+        self.image = image
+        self.start = start
+        self.end = end
+        self.origin = origin
+        self.target = target or origin
+        self.move = move
+        self.fade = fade
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.image.shape[1], self.image.shape[0]
+
+    @property
+    def moves(self) -> bool:
+        return self.move > 0 and self.target != self.origin
+
+    def shifted(self, offset: float) -> "Layer":
+        return Layer(self.image, self.start + offset, self.end + offset,
+                     self.origin, self.target, self.move, self.fade)
+
+class AudioCue:
+    """
+    A sound placed on an output timeline at `start` seconds with a linear gain,
+    optionally cut to `length` seconds after skipping its first `skip` seconds.
+    `source` names the sound, for the backend to resolve to PCM or a file.
+    """
+
+    def __init__(self, source: str, start: float = 0.0, gain: float = 1.0, skip: float = 0.0,
+                 length: Optional[float] = None):
+        self.source = source
+        self.start = start
+        self.gain = gain
+        self.skip = skip
+        self.length = length
+
+    def shifted(self, offset: float) -> "AudioCue":
+        return AudioCue(self.source, self.start + offset, self.gain, self.skip, self.length)
+
+def _merge(rects: List[Rect]) -> List[Rect]:
+    """Merge overlapping (x0, y0, x1, y1) rectangles, so no pixel is redrawn twice."""
+    merged = []
+    for rect in rects:
+        x0, y0, x1, y1 = rect
+        overlapping = True
+        while overlapping:
+            overlapping = False
+            for other in merged:
+                if other[0] < x1 and x0 < other[2] and other[1] < y1 and y0 < other[3]:
+                    merged.remove(other)
+                    x0, y0 = min(x0, other[0]), min(y0, other[1])
+                    x1, y1 = max(x1, other[2]), max(y1, other[3])
+                    overlapping = True
+                    break
+        merged.append((x0, y0, x1, y1))
+    return merged
+
+class TimelineClip(VideoClip):
+    """
+    Composites a flat list of layers over a still background as one clip.
+    Visibility, position and opacity of every layer are tabulated for every
+    output frame up front with NumPy, so producing a frame costs a table lookup
+    plus redrawing only the rectangles where a layer appeared, disappeared,
+    moved or changed opacity since the previous frame. Frames in which nothing
+    changes are returned as-is, whatever the number of layers.
+
+    Layers are blended as moviepy's compositor does: positions are truncated
+    to whole pixels and opacity scales the layer's alpha.
+
+    A clip that is one segment of a longer video takes its start in that video
+    as `offset`, so its frames are tabulated on the video's frame grid rather
+    than its own.
+    """
+
+    def __init__(self, background: np.ndarray, layers: List[Layer], duration: float, fps: float, offset: float = 0.0):
+        super().__init__(duration=duration)
+        self.size = (background.shape[1], background.shape[0])
+        self.fps = fps
+        self.offset = offset
+        self.background = background
+        self.layers = layers
+
+        self._start = np.array([layer.start for layer in layers], dtype=float)
+        self._end = np.array([layer.end for layer in layers], dtype=float)
+        self._origin = np.array([layer.origin for layer in layers], dtype=float).reshape(-1, 2)
+        self._target = np.array([layer.target for layer in layers], dtype=float).reshape(-1, 2)
+        self._move = np.array([layer.move for layer in layers], dtype=float)
+        self._fade = np.array([layer.fade for layer in layers], dtype=float)
+        self._width = np.array([layer.size[0] for layer in layers], dtype=np.int64)
+        self._height = np.array([layer.size[1] for layer in layers], dtype=np.int64)
+
+        self._rgb = [np.ascontiguousarray(layer.image[..., :3]) for layer in layers]
+        self._alpha = [
+            layer.image[..., 3:].astype(np.uint16)
+            if layer.image.shape[2] == 4 and layer.image[..., 3].min() < 255 else None
+            for layer in layers
+        ]
+
+        # Output frames within the clip, numbered on the output's grid
+        frames = np.arange(int(np.floor(offset * fps)), int(np.ceil((offset + duration) * fps)) + 1)
+        frames = frames[(frames / fps >= offset) & (frames / fps < offset + duration)]
+        self._first = int(frames[0]) if len(frames) else 0
+        self._table = self._states(frames / fps - offset)
+        self._frame: Optional[np.ndarray] = None
+        self._shown = None
+        self.frame_function = self._get_frame
+
+    def _states(self, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Visibility, x, y and opacity of every layer at each time.
+        Returns:
+            Arrays of shape (len(t), layers)
+        """
+        t = t[:, np.newaxis]
+        elapsed = t - self._start
+        visible = (elapsed >= 0) & (t < self._end)
+
+        moving = self._move > 0
+        progress = np.where(moving, np.clip(elapsed / np.where(moving, self._move, 1), 0, 1), 1)
+        x = np.trunc(self._origin[:, 0] + (self._target[:, 0] - self._origin[:, 0]) * progress).astype(np.int64)
+        y = np.trunc(self._origin[:, 1] + (self._target[:, 1] - self._origin[:, 1]) * progress).astype(np.int64)
+
+        fading = self._fade > 0
+        opacity = np.where(fading, np.clip(elapsed / np.where(fading, self._fade, 1), 0, 1), 1)
+        return visible, x, y, opacity
+
+    def _state_at(self, t: float):
+        position = (t + self.offset) * self.fps
+        index = int(round(position)) - self._first
+        if abs(position - round(position)) < 1e-6 and 0 <= index < len(self._table[0]):
+            return tuple(column[index] for column in self._table)
+        # Off the frame grid, e.g. when played at another frame rate
+        return tuple(column[0] for column in self._states(np.array([t])))
+
+    def _bounds(self, state, index: int) -> Rect:
+        _, x, y, _ = state
+        return x[index], y[index], x[index] + self._width[index], y[index] + self._height[index]
+
+    def _draw(self, rect: Rect, state):
+        """Redraw a rectangle of the frame: background, then every visible layer over it in order."""
+        width, height = self.size
+        x0, y0, x1, y1 = max(rect[0], 0), max(rect[1], 0), min(rect[2], width), min(rect[3], height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        self._frame[y0:y1, x0:x1] = self.background[y0:y1, x0:x1]
+
+        visible, x, y, opacity = state
+        hits = visible & (x < x1) & (x + self._width > x0) & (y < y1) & (y + self._height > y0)
+        for index in np.flatnonzero(hits):
+            # Part of the layer inside the rectangle, in frame and in layer coordinates
+            fx0, fy0 = max(x0, x[index]), max(y0, y[index])
+            fx1, fy1 = min(x1, x[index] + self._width[index]), min(y1, y[index] + self._height[index])
+            lx0, ly0 = fx0 - x[index], fy0 - y[index]
+            src = self._rgb[index][ly0:ly0 + fy1 - fy0, lx0:lx0 + fx1 - fx0]
+            dst = self._frame[fy0:fy1, fx0:fx1]
+
+            alpha = self._alpha[index]
+            if alpha is None and opacity[index] >= 1:
+                dst[...] = src
+                continue
+
+            if alpha is None:
+                alpha = np.full(src.shape[:2] + (1,), 255, dtype=np.uint16)
+            else:
+                alpha = alpha[ly0:ly0 + fy1 - fy0, lx0:lx0 + fx1 - fx0]
+            if opacity[index] < 1:
+                alpha = (alpha * opacity[index]).astype(np.uint16)
+            dst[...] = ((src * alpha + dst * (255 - alpha) + 127) // 255).astype(np.uint8)
+
+    def _get_frame(self, t: float) -> np.ndarray:
+        state = self._state_at(t)
+
+        if self._frame is None:
+            self._frame = np.array(self.background, dtype=np.uint8)
+            self._shown = None
+
+        if self._shown is None:
+            rects = [(0, 0, self.size[0], self.size[1])]
+        else:
+            visible, x, y, opacity = state
+            was_visible, was_x, was_y, was_opacity = self._shown
+            changed = (visible != was_visible) | (visible & ((x != was_x) | (y != was_y) | (opacity != was_opacity)))
+            rects = []
+            for index in np.flatnonzero(changed):
+                if was_visible[index]:
+                    rects.append(self._bounds(self._shown, index))
+                if visible[index]:
+                    rects.append(self._bounds(state, index))
+
+        for rect in _merge(rects):
+            self._draw(rect, state)
+        self._shown = state
+
+        # The frame buffer is reused for the next frame; encoders consume it right away
+        return self._frame
+
+    def close(self):
+        self._frame = None
+        self._shown = None
+        super().close()
@@ -0,0 +1,39 @@
+import logging
+from abc import ABC, abstractmethod
+import os
+from typing import Dict, List, Optional
+from app.core.uploads.engine import ResumableUpload
+
+logger = logging.getLogger('uvicorn.error')
+
+class PlatformBase(ABC):
+    """
+    A video platform reached through the resumable upload engine. Subclasses
+    name the platform and its upload endpoint; a platform without an endpoint
+    configured produces no upload jobs.
+    """
+
+    NAME = ""
+
+    @property
+    @abstractmethod
+    def upload_url(self) -> Optional[str]:
+        pass
+
+    def headers(self, credentials: Dict) -> Dict[str, str]:
+        token = credentials.get("access_token")
+        return {"Authorization": f"Bearer {token}"} if token else {}
+
+    def metadata(self, path: str) -> Dict:
+        return {"title": os.path.splitext(os.path.basename(path))[0]}
+
+    def jobs(self, credentials: Dict, files: List[str]) -> List[ResumableUpload]:
+        if not self.upload_url:
+            logger.warning(f"No {self.NAME} upload endpoint configured for: {files}")
+            return []
+
+        return [
+            ResumableUpload(self.NAME, path, self.upload_url, self.headers(credentials), self.metadata(path))
+            for path in files
+        ]
+
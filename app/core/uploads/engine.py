@@ -0,0 +1,214 @@
+import aiofiles
+import aiohttp
+import asyncio
+import json
+import logging
+import os
+import re
+from typing import Dict, List, Optional
+from app.config import settings
+from app.core.apis.http import HttpClient
+
+logger = logging.getLogger('uvicorn.error')
+
+class UploadError(Exception):
+    pass
+
+class UploadSessionExpired(UploadError):
+    """The server no longer knows the session; the upload has to start over."""
+
+class ResumableUpload:
+    """
+    One file sent to one platform over the resumable upload protocol:
+
+        POST init_url (JSON metadata, X-Upload-Content-Length)
+            -> 200/201 with the session URL in Location
+        PUT session_url, Content-Range: bytes start-end/total
+            -> 308 with Range: bytes=0-last while incomplete, 200/201 when done
+        PUT session_url, Content-Range: bytes */total (empty body)
+            -> asks how much the server already has
+
+    The session URL and committed offset are kept in a sidecar file next to
+    the video, so a retried job resumes instead of starting over, and a failed
+    chunk is resent from the last offset the server confirmed.
+    """
+
+    RANGE = re.compile(r"bytes=(\d+)-(\d+)")
+
+    def __init__(self, platform: str, path: str, init_url: str, headers: Dict[str, str], metadata: Dict):
+        self.platform = platform
+        self.path = path
+        self.init_url = init_url
+        self.headers = headers
+        self.metadata = metadata
+        self.size = os.path.getsize(path)
+        self.state_path = self.state_path_for(path, platform)
+
+    @staticmethod
+    def state_path_for(path: str, platform: str) -> str:
+        directory, name = os.path.split(path)
+        return os.path.join(directory, f".{name}.{platform}.upload")
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            if state.get("size") == self.size:
+                return state
+        except (FileNotFoundError, ValueError):
+            pass
+        return {"size": self.size}
+
+    def _save_state(self, state: Dict):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _committed(self, response) -> int:
+        """Offset after the last byte the server confirmed in a 308 response."""
+        match = self.RANGE.match(response.headers.get("Range", ""))
+        return int(match.group(2)) + 1 if match else 0
+
+    async def _open_session(self) -> str:
+        headers = {
+            **self.headers,
+            "X-Upload-Content-Length": str(self.size),
+            "X-Upload-Content-Type": "video/mp4",
+        }
+        async with HttpClient.session().post(self.init_url, json=self.metadata, headers=headers) as response:
+            if response.status not in (200, 201) or "Location" not in response.headers:
+                raise UploadError(f"{self.platform}: could not open upload session ({response.status})")
+            return response.headers["Location"]
+
+    async def _query_offset(self, session_url: str) -> Optional[int]:
+        """Ask the server how much it has; None if the upload is already complete."""
+        headers = {**self.headers, "Content-Range": f"bytes */{self.size}"}
+        async with HttpClient.session().put(session_url, headers=headers) as response:
+            if response.status in (200, 201):
+                return None
+            if response.status == 308:
+                return self._committed(response)
+            if response.status in (404, 410):
+                raise UploadSessionExpired(f"{self.platform}: upload session expired ({response.status})")
+            raise UploadError(f"{self.platform}: could not query upload offset ({response.status})")
+
+    async def _send_chunk(self, session_url: str, offset: int, chunk_size: int) -> Optional[int]:
+        """Send one chunk; returns the new committed offset, or None once the upload is complete."""
+        async with aiofiles.open(self.path, "rb") as f:
+            await f.seek(offset)
+            chunk = await f.read(chunk_size)
+
+        end = offset + len(chunk) - 1
+        headers = {
+            **self.headers,
+            "Content-Type": "video/mp4",
+            "Content-Range": f"bytes {offset}-{end}/{self.size}",
+        }
+        async with HttpClient.session().put(session_url, data=chunk, headers=headers) as response:
+            if response.status in (200, 201):
+                return None
+            if response.status == 308:
+                return self._committed(response)
+            if response.status in (404, 410):
+                raise UploadSessionExpired(f"{self.platform}: upload session expired ({response.status})")
+            raise UploadError(f"{self.platform}: chunk {offset}-{end} rejected ({response.status})")
+
+    async def run(self, chunk_size: int, max_retries: int, backoff: float):
+        state = self._load_state()
+        if state.get("done"):
+            logger.info(f"{self.platform}: {self.path} already uploaded")
+            return
+
+        failures = 0
+        offset = None
+        while True:
+            try:
+                if not state.get("session_url"):
+                    state = {"size": self.size, "session_url": await self._open_session(), "offset": 0}
+                    self._save_state(state)
+                    offset = 0
+                elif offset is None:
+                    # Resuming: trust the server over our own bookkeeping
+                    offset = await self._query_offset(state["session_url"])
+
+                while offset is not None:
+                    offset = await self._send_chunk(state["session_url"], offset, chunk_size)
+                    if offset is not None:
+                        state["offset"] = offset
+                        self._save_state(state)
+                        failures = 0
+
+                state["done"] = True
+                self._save_state(state)
+                logger.info(f"{self.platform}: uploaded {self.path} ({self.size} bytes)")
+                return
+
+            except (UploadError, aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                failures += 1
+                if failures > max_retries:
+                    raise UploadError(f"{self.platform}: giving up on {self.path}: {str(e)}") from e
+
+                logger.warning(f"{str(e)}; retry {failures}/{max_retries}")
+                if isinstance(e, UploadSessionExpired):
+                    state.pop("session_url", None)
+                offset = None
+                await asyncio.sleep(backoff * 2 ** (failures - 1))
+
+class UploadEngine:
+    """
+    Runs uploads for many platforms and files at once. Each platform has its
+    own concurrency limit and all files share a global one; one file failing
+    on one platform doesn't stop the others.
+    """
+
+    def __init__(
+            self,
+            chunk_size: int,
+            max_retries: int,
+            backoff: float,
+            max_concurrency: int,
+            platform_limits: Dict[str, int]
+        ):
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self.platform_limits = platform_limits
+
+    async def upload(self, jobs: List[ResumableUpload]) -> List[Optional[Exception]]:
+        """
+        Run upload jobs concurrently within the limits.
+        Returns:
+            For each job, None on success or the exception it failed with
+        """
+        # Semaphores belong to the running loop, so they are made per call
+        overall = asyncio.Semaphore(self.max_concurrency)
+        per_platform = {
+            job.platform: asyncio.Semaphore(self.platform_limits.get(job.platform, self.max_concurrency))
+            for job in jobs
+        }
+
+        async def run(job: ResumableUpload):
+            async with per_platform[job.platform], overall:
+                await job.run(self.chunk_size, self.max_retries, self.backoff)
+
+        results = await asyncio.gather(*(run(job) for job in jobs), return_exceptions=True)
+        return [result if isinstance(result, Exception) else None for result in results]
+
+    @staticmethod
+    def clear_state(path: str, platforms: List[str]):
+        """Forget resume state once a video is fully uploaded everywhere."""
+        for platform in platforms:
+            try:
+                os.remove(ResumableUpload.state_path_for(path, platform))
+            except FileNotFoundError:
+                pass
+
+upload_engine = UploadEngine(
+    settings.UPLOAD_CHUNK_SIZE,
+    settings.UPLOAD_MAX_RETRIES,
+    settings.UPLOAD_RETRY_BACKOFF,
+    settings.UPLOAD_MAX_CONCURRENCY,
+    settings.UPLOAD_PLATFORM_LIMITS
+)
@@ -1,6 +1,7 @@
-from pathlib import Path
-from app.config import settings
+import asyncio
+from app.core.manifest import video_manifest
 from app.core.uploads.base.upload import UploadBase
+from app.core.uploads.engine import UploadError, upload_engine
 from app.core.uploads.platforms import ( 
     TikTok, 
     YouTube,
@@ -32,28 +33,57 @@ class UploadInstance(UploadBase):
             if not any(platform in credentials for platform in self.platforms):
                 return {"status": "error", "message": "No credentials found for this instance."}
 
-            dir = Path(settings.VIDEOS_TMP_DIR)
-            matched_files = set()
+            # Chained uploads name their video; otherwise take the accounts' videos
+            # waiting in the manifest
+            if instance_config.get("files"):
+                videos = await asyncio.to_thread(video_manifest.claim_paths, instance_config["files"])
+            else:
+                videos = await asyncio.to_thread(video_manifest.claim_accounts, accounts)
 
-            for account in accounts:
-                for file in dir.iterdir():
-                    if file.is_file():
-                        if account in file.name or file.name == account:
-                            matched_files.add(str(file.resolve()))
-
-            files = list(matched_files)
+            files = [video["path"] for video in videos]
 
             if not files:
                 logger.warning(f"No files found for accounts: {accounts}")
                 return {"status": "error", "message": "No files found to upload."}
 
-            for platform_name, platform_obj in self.platforms.items():
-                cred = credentials.get(platform_name)
-                if cred:
-                    await platform_obj.upload(cred, files)
-                    logger.info(f"Upload for {platform_name} completed successfully.")
-                else:
-                    logger.info(f"No credentials for {platform_name}, skipping upload.")
+            # Every platform and file goes through one engine call, so they all
+            # upload concurrently within the engine's limits
+            try:
+                jobs, platforms, failed = [], [], {}
+                for platform_name, platform_obj in self.platforms.items():
+                    cred = credentials.get(platform_name)
+                    if not cred:
+                        logger.info(f"No credentials for {platform_name}, skipping upload.")
+                        continue
+
+                    platform_jobs = platform_obj.jobs(cred, files)
+                    if platform_jobs:
+                        jobs += platform_jobs
+                        platforms.append(platform_name)
+                    else:
+                        # The instance expects this platform, so its videos stay pending
+                        for path in files:
+                            failed.setdefault(path, f"No {platform_name} upload endpoint configured")
+                errors = await upload_engine.upload(jobs)
+            except Exception as e:
+                await asyncio.to_thread(video_manifest.release, files, str(e))
+                raise
+
+            for job, error in zip(jobs, errors):
+                if error:
+                    failed.setdefault(job.path, str(error))
+            uploaded = [path for path in files if path not in failed]
+
+            if uploaded:
+                await asyncio.to_thread(video_manifest.uploaded, uploaded)
+                for path in uploaded:
+                    upload_engine.clear_state(path, platforms)
+            # Failed files go back to the manifest; platforms they already reached
+            # are skipped on retry and partial uploads resume from their offset
+            for path, error in failed.items():
+                await asyncio.to_thread(video_manifest.release, [path], error)
+            if failed:
+                raise UploadError(f"{len(failed)} of {len(files)} files failed to upload: {next(iter(failed.values()))}")
 
             logger.info("Pipeline completed successfully")
             return {"status": "success", "message": "ok"}
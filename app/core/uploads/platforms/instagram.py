@@ -1,8 +1,9 @@
-import logging
+from app.config import settings
+from app.core.uploads.base.platform import PlatformBase
 
-logger = logging.getLogger('uvicorn.error')
+class Instagram(PlatformBase):
+    NAME = "instagram"
 
-class Instagram:
-    async def upload(self, credentials, files):
-        logger.info(f"Starting instagram upload")
-        logger.info(f"Files: {files}")
+    @property
+    def upload_url(self):
+        return settings.INSTAGRAM_UPLOAD_URL
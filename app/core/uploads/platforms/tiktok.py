@@ -1,8 +1,9 @@
-import logging
+from app.config import settings
+from app.core.uploads.base.platform import PlatformBase
 
-logger = logging.getLogger('uvicorn.error')
+class TikTok(PlatformBase):
+    NAME = "tiktok"
 
-class TikTok:
-    async def upload(self, credentials, files):
-        logger.info(f"Starting tiktok upload")
-        logger.info(f"Files: {files}")
+    @property
+    def upload_url(self):
+        return settings.TIKTOK_UPLOAD_URL
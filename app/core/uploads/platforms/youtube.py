@@ -1,8 +1,9 @@
-import logging
+from app.config import settings
+from app.core.uploads.base.platform import PlatformBase
 
-logger = logging.getLogger('uvicorn.error')
+class YouTube(PlatformBase):
+    NAME = "youtube"
 
-class YouTube:
-    async def upload(self, credentials, files):
-        logger.info(f"Starting youtube upload")
-        logger.info(f"Files: {files}")
+    @property
+    def upload_url(self):
+        return settings.YOUTUBE_UPLOAD_URL
@@ -0,0 +1,96 @@
+"""
+Local stand-in for the platforms' resumable upload endpoints, to exercise and
+benchmark the upload engine offline. Every platform URL can point at it:
+
+    python -m app.core.uploads.standin --port 8089 --fail-rate 0.1
+    TIKTOK_UPLOAD_URL=http://localhost:8089/upload/tiktok
+
+Received bytes are counted but not kept. `--fail-rate` rejects that share of
+chunk requests with a 503, and `--latency` delays every request, to mimic a
+slow or flaky platform.
+"""
+import argparse
+import asyncio
+import random
+import re
+import uuid
+from aiohttp import web
+
+CONTENT_RANGE = re.compile(r"bytes (?:(\d+)-(\d+)|\*)/(\d+)")
+
+def create_app(fail_rate: float = 0.0, latency: float = 0.0) -> web.Application:
+    sessions = {}
+    stats = {"sessions": 0, "completed": 0, "chunks": 0, "rejected": 0, "bytes": 0}
+
+    def incomplete(session):
+        headers = {"Range": f"bytes=0-{session['offset'] - 1}"} if session["offset"] else {}
+        return web.Response(status=308, headers=headers)
+
+    async def init(request: web.Request):
+        await asyncio.sleep(latency)
+        size = request.headers.get("X-Upload-Content-Length")
+        if size is None:
+            return web.Response(status=400, text="X-Upload-Content-Length is required")
+
+        session_id = uuid.uuid4().hex
+        sessions[session_id] = {
+            "platform": request.match_info["platform"],
+            "metadata": await request.json(),
+            "size": int(size),
+            "offset": 0
+        }
+        stats["sessions"] += 1
+        location = request.url.join(request.app.router["session"].url_for(session_id=session_id))
+        return web.Response(status=201, headers={"Location": str(location)})
+
+    async def put(request: web.Request):
+        await asyncio.sleep(latency)
+        session = sessions.get(request.match_info["session_id"])
+        if session is None:
+            return web.Response(status=404)
+
+        match = CONTENT_RANGE.fullmatch(request.headers.get("Content-Range", ""))
+        if not match or int(match.group(3)) != session["size"]:
+            return web.Response(status=400, text="Invalid Content-Range")
+
+        if match.group(1) is None:
+            # Offset query
+            return web.Response(status=201) if session["offset"] == session["size"] else incomplete(session)
+
+        if random.random() < fail_rate:
+            stats["rejected"] += 1
+            return web.Response(status=503)
+
+        start, end = int(match.group(1)), int(match.group(2))
+        body = await request.read()
+        if start != session["offset"] or len(body) != end - start + 1:
+            # Out of order or truncated: tell the client where to resume
+            return incomplete(session)
+
+        session["offset"] = end + 1
+        stats["chunks"] += 1
+        stats["bytes"] += len(body)
+        if session["offset"] < session["size"]:
+            return incomplete(session)
+
+        stats["completed"] += 1
+        return web.json_response({"id": request.match_info["session_id"]}, status=201)
+
+    async def get_stats(request: web.Request):
+        return web.json_response(stats)
+
+    app = web.Application(client_max_size=1024 ** 3)
+    app.router.add_post("/upload/{platform}", init)
+    app.router.add_put("/sessions/{session_id}", put, name="session")
+    app.router.add_get("/stats", get_stats)
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in resumable upload server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of chunk requests answered with 503")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    args = parser.parse_args()
+
+    web.run_app(create_app(args.fail_rate, args.latency), host=args.host, port=args.port)
@@ -0,0 +1,132 @@
+import json
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import redis
+from dramatiq.middleware import CurrentMessage
+from app.config import settings
+
+logger = logging.getLogger('uvicorn.error')
+
+class BatchTracker:
+    """
+    Completion status of fanned-out batches, kept in Redis so the API and every
+    worker see the same view. A batch has one entry per instance, moving through
+    queued -> running -> succeeded, or retrying/failed when it raises.
+    """
+
+    STATES = ("queued", "running", "retrying", "succeeded", "failed")
+
+    def __init__(self, url: Optional[str], ttl: int):
+        self.url = url
+        self.ttl = ttl
+        self._client = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    @staticmethod
+    def _meta_key(batch_id: str) -> str:
+        return f"darkbot:batch:{batch_id}"
+
+    @staticmethod
+    def _instances_key(batch_id: str) -> str:
+        return f"darkbot:batch:{batch_id}:instances"
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def create(self, batch_id: str, kind: str, total: int):
+        """Register a new batch with every instance queued."""
+        if not self.enabled:
+            return
+
+        try:
+            pipe = self.client.pipeline()
+            pipe.hset(self._meta_key(batch_id), mapping={
+                "kind": kind,
+                "total": total,
+                "created_at": time.time()
+            })
+            pipe.hset(self._instances_key(batch_id), mapping={
+                str(i): json.dumps({"state": "queued"}) for i in range(total)
+            })
+            pipe.expire(self._meta_key(batch_id), self.ttl)
+            pipe.expire(self._instances_key(batch_id), self.ttl)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.error(f"Could not register batch {batch_id}: {str(e)}")
+
+    def update(self, batch_id: Optional[str], instance: int, state: str, **details):
+        if not self.enabled or not batch_id:
+            return
+
+        try:
+            self.client.hset(
+                self._instances_key(batch_id),
+                str(instance),
+                json.dumps({"state": state, "updated_at": time.time(), **details})
+            )
+        except redis.RedisError as e:
+            # Status is informational, it must never fail the job itself
+            logger.error(f"Could not update batch {batch_id}: {str(e)}")
+
+    def failed(self, batch_id: Optional[str], instance: int, error: Exception, max_retries: int) -> str:
+        """
+        Record a failure, as retrying while the current message has retries left.
+        Returns:
+            The recorded state, "retrying" or "failed"
+        """
+        message = CurrentMessage.get_current_message()
+        retries = message.options.get("retries", 0) if message else max_retries
+        state = "retrying" if retries < max_retries else "failed"
+        self.update(batch_id, instance, state, error=str(error), attempt=retries + 1)
+        return state
+
+    def status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Aggregated status of a batch.
+        Returns:
+            Counts per state, overall status and per-instance details, or None if unknown
+        """
+        meta = self.client.hgetall(self._meta_key(batch_id))
+        if not meta:
+            return None
+
+        instances = {
+            int(index): json.loads(value)
+            for index, value in self.client.hgetall(self._instances_key(batch_id)).items()
+        }
+        counts = {state: 0 for state in self.STATES}
+        for instance in instances.values():
+            counts[instance["state"]] += 1
+
+        if counts["succeeded"] + counts["failed"] < int(meta["total"]):
+            overall = "in_progress"
+        elif counts["failed"] == 0:
+            overall = "succeeded"
+        elif counts["succeeded"] == 0:
+            overall = "failed"
+        else:
+            overall = "partial"
+
+        return {
+            "batch_id": batch_id,
+            "kind": meta["kind"],
+            "total": int(meta["total"]),
+            "status": overall,
+            "counts": counts,
+            "instances": [instances[i] for i in sorted(instances)]
+        }
+
+batch_tracker = BatchTracker(settings.REDIS_URL, settings.BATCH_TTL)
@@ -0,0 +1,28 @@
+import asyncio
+import threading
+
+_local = threading.local()
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get the calling worker thread's long-lived event loop.
+    Unlike a fresh asyncio.run per message, this keeps loop-bound resources
+    (pooled HTTP sessions) alive across messages.
+    """
+    loop = getattr(_local, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _local.loop = loop
+    return loop
+
+def run_async(coro):
+    """Run a coroutine to completion on the thread's event loop."""
+    return get_loop().run_until_complete(coro)
+
+def close_loop():
+    loop = getattr(_local, "loop", None)
+    if loop is not None and not loop.is_closed():
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+    _local.loop = None
@@ -0,0 +1,31 @@
+import logging
+from dramatiq import Middleware
+from app.core.apis import Google, HttpClient
+from app.config import settings
+from app.core.bots.processing import Workspace
+from app.core.background import close_background_loop
+from app.core.render import render_executor
+from app.workers.loop import close_loop, run_async
+
+logger = logging.getLogger('uvicorn.error')
+
+class WorkerLifecycle(Middleware):
+    """Owns worker-wide resources that must be released when a worker stops."""
+
+    def after_worker_boot(self, broker, worker):
+        Workspace.sweep(settings.WORKSPACE_MAX_AGE)
+
+    def after_worker_thread_boot(self, broker, thread):
+        run_async(HttpClient.open())
+
+    def before_worker_thread_shutdown(self, broker, thread):
+        try:
+            run_async(HttpClient.close())
+        finally:
+            close_loop()
+
+    def before_worker_shutdown(self, broker, worker):
+        logger.info("Shutting down render executor")
+        render_executor.shutdown()
+        close_background_loop(HttpClient.close)
+        Google.close()
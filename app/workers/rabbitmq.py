@@ -1,6 +1,10 @@
 from app.config import settings
 import dramatiq
 from dramatiq.brokers.rabbitmq import RabbitmqBroker
+from dramatiq.middleware import CurrentMessage
+from app.workers.middleware import WorkerLifecycle
 
 broker = RabbitmqBroker(url=settings.RABBITMQ_URL)
+broker.add_middleware(WorkerLifecycle())
+broker.add_middleware(CurrentMessage())
 dramatiq.set_broker(broker)
@@ -1,55 +1,186 @@
-import asyncio
 import dramatiq
-from app.utils import run_with_concurrency_limit
+import threading
+from typing import Optional
 from app.utils import validate_config_instances
 from app.workers import rabbitmq
+from app.workers.batches import batch_tracker
+from app.workers.loop import run_async
 from app.config import settings
 from app.core.bots.factories.bot_factory import BotFactory
+from app.core.bots.processing import Workspace
 from app.core.uploads.implementations.upload import UploadInstance
 import logging
 
 logger = logging.getLogger('uvicorn.error')
 
+# Instances running at once in this worker process, across all its threads;
+# the others wait for a slot with their message still held
+instance_slots = threading.BoundedSemaphore(settings.MAX_CONCURRENT_INSTANCES)
+
+def dispatch_bot_instances(bot_type: str, config: dict, instances: int, batch_id: Optional[str] = None) -> str:
+    """
+    Fan a bot request out into one message per instance, grouped under a batch,
+    so instances spread over the worker fleet and retry independently.
+    Returns:
+        The batch id
+    """
+    validate_config_instances(config, instances)
+    batch_id = batch_id or batch_tracker.new_id()
+    batch_tracker.create(batch_id, "bot", instances)
+    send_bot_instances(bot_type, config, instances, batch_id)
+    return batch_id
+
+def send_bot_instances(bot_type: str, config: dict, instances: int, batch_id: str):
+    """Send one message per instance of an already registered batch."""
+    # In split mode the first stage is scraping; rendering is chained from there
+    actor = scrape_instance if settings.PIPELINE_MODE == "split" else run_bot_instance
+    for i in range(instances):
+        actor.send(bot_type, config, i, batch_id)
+
+    logger.info(f"Batch {batch_id}: dispatched {instances} instances of bot {bot_type}")
+
+def dispatch_upload_instances(config: dict, instances: int, batch_id: Optional[str] = None) -> str:
+    """
+    Fan an upload request out into one message per instance, grouped under a batch.
+    Returns:
+        The batch id
+    """
+    validate_config_instances(config, instances)
+    batch_id = batch_id or batch_tracker.new_id()
+    batch_tracker.create(batch_id, "upload", instances)
+    send_upload_instances(config, instances, batch_id)
+    return batch_id
+
+def send_upload_instances(config: dict, instances: int, batch_id: str):
+    """Send one upload message per instance of an already registered batch."""
+    for i in range(instances):
+        run_upload_instance.send(config, i, batch_id)
+
+    logger.info(f"Batch {batch_id}: dispatched {instances} upload instances")
+
+def chain_upload(instance_config: dict, video: str):
+    """Queue the upload stage for a rendered video when the instance asks for it."""
+    upload = instance_config.get("upload")
+    if not upload:
+        return
+
+    batch_id = dispatch_upload_instances(
+        config={"instances": [{"account": [instance_config.get("account", "")], "files": [video], **upload}]},
+        instances=1
+    )
+    logger.info(f"Upload of {video} queued as batch {batch_id}")
+
 @dramatiq.actor(
     queue_name=settings.BOT_QUEUE_NAME,
     max_retries=settings.MAX_RETRIES,
     priority=settings.PRIORITY
 )
 def start_bot_instances(bot_type: str, config: dict, instances: int):
+    """Entry point for multi-instance messages; fans them out like the API does."""
     try:
         logger.info(f"Starting {instances} instances of bot {bot_type}")
-        validate_config_instances(config, instances)
-
-        # Create bot factory and instances
-        bot = BotFactory.create(bot_type, config)
-        bot_instances = [bot.create_instance(i) for i in range(instances)]
-        
-        # Prepare coroutines for execution
-        coroutines = [instance.run_pipeline() for instance in bot_instances]
-
-        # Execute all pipelines with concurrency control
-        results = asyncio.run(
-            run_with_concurrency_limit(
-                coroutines,
-                max_concurrent=settings.MAX_CONCURRENT_INSTANCES
-            )
+        dispatch_bot_instances(bot_type, config, instances)
+
+    except Exception as e:
+        logger.error(
+            f"Critical error processing bot {bot_type}: {str(e)}",
+            exc_info=True
         )
+        raise
+
+@dramatiq.actor(
+    queue_name=settings.BOT_QUEUE_NAME,
+    max_retries=settings.MAX_RETRIES,
+    priority=settings.PRIORITY
+)
+def run_bot_instance(bot_type: str, config: dict, instance_number: int, batch_id: Optional[str] = None):
+    """Run the whole pipeline of one bot instance."""
+    try:
+        with instance_slots:
+            logger.info(f"Running instance {instance_number} of bot {bot_type}")
+            batch_tracker.update(batch_id, instance_number, "running")
 
-        # Process results and handle errors
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(
-                    f"Instance {i} failed: {str(result)}",
-                    exc_info=result
-                )
-            else:
-                logger.info(f"Instance {i} completed. Result: {result}")
+            instance = BotFactory.create(bot_type, config).create_instance(instance_number)
+            result = run_async(instance.run_pipeline())
+        if result.get("status") != "success":
+            raise RuntimeError(result.get("message"))
+
+        logger.info(f"Instance {instance_number} completed. Result: {result}")
+        batch_tracker.update(batch_id, instance_number, "succeeded", result=result["message"])
+        chain_upload(config["instances"][instance_number], result["message"])
 
     except Exception as e:
         logger.error(
-            f"Critical error processing bot {bot_type}: {str(e)}",
+            f"Instance {instance_number} of bot {bot_type} failed: {str(e)}",
+            exc_info=True
+        )
+        batch_tracker.failed(batch_id, instance_number, e, settings.MAX_RETRIES)
+        raise
+
+@dramatiq.actor(
+    queue_name=settings.SCRAPE_QUEUE_NAME,
+    max_retries=settings.MAX_RETRIES,
+    priority=settings.PRIORITY
+)
+def scrape_instance(bot_type: str, config: dict, instance_number: int, batch_id: Optional[str] = None):
+    """Pipeline stage 1: gather content and hand its manifest to the render queue."""
+    try:
+        with instance_slots:
+            logger.info(f"Scraping instance {instance_number} of bot {bot_type}")
+            batch_tracker.update(batch_id, instance_number, "running", stage="scrape")
+
+            instance = BotFactory.create(bot_type, config).create_instance(instance_number)
+
+            # The workspace outlives this stage, so it has to be on disk; render removes it
+            workspace = Workspace(f"{bot_type}_{instance_number}", backend="disk")
+            try:
+                content = run_async(instance.scrape(workspace))
+            except Exception:
+                workspace.cleanup()
+                raise
+        content["workspace"] = workspace.path
+
+        render_instance.send(bot_type, config, instance_number, content, batch_id)
+        batch_tracker.update(batch_id, instance_number, "queued", stage="render")
+        logger.info(f"Instance {instance_number} scraped, handed off to render")
+
+    except Exception as e:
+        logger.error(
+            f"Scraping instance {instance_number} of bot {bot_type} failed: {str(e)}",
+            exc_info=True
+        )
+        batch_tracker.failed(batch_id, instance_number, e, settings.MAX_RETRIES)
+        raise
+
+@dramatiq.actor(
+    queue_name=settings.RENDER_QUEUE_NAME,
+    max_retries=settings.MAX_RETRIES,
+    priority=settings.PRIORITY
+)
+def render_instance(bot_type: str, config: dict, instance_number: int, content: dict, batch_id: Optional[str] = None):
+    """Pipeline stage 2: render the scraped content, then chain the upload stage."""
+    try:
+        with instance_slots:
+            logger.info(f"Rendering instance {instance_number} of bot {bot_type}")
+            batch_tracker.update(batch_id, instance_number, "running", stage="render")
+
+            instance = BotFactory.create(bot_type, config).create_instance(instance_number)
+            video = run_async(instance.render(content))
+        if content.get("workspace"):
+            Workspace.attach(content["workspace"]).cleanup()
+
+        logger.info(f"Instance {instance_number} rendered: {video}")
+        batch_tracker.update(batch_id, instance_number, "succeeded", result=video)
+        chain_upload(config["instances"][instance_number], video)
+
+    except Exception as e:
+        logger.error(
+            f"Rendering instance {instance_number} of bot {bot_type} failed: {str(e)}",
             exc_info=True
         )
+        # Retries still need the scraped media; only the final failure drops it
+        if batch_tracker.failed(batch_id, instance_number, e, settings.MAX_RETRIES) == "failed" and content.get("workspace"):
+            Workspace.attach(content["workspace"]).cleanup()
         raise
 
 @dramatiq.actor(
@@ -58,29 +189,40 @@ def start_bot_instances(bot_type: str, config: dict, instances: int):
     priority=settings.PRIORITY
 )
 def start_upload_instances(config: dict, instances: int):
+    """Entry point for multi-instance upload messages; fans them out like the API does."""
     try:
         logger.info(f"Uploading videos task starting...")
-        validate_config_instances(config, instances)
-
-        upload_instances = [UploadInstance(i, config) for i in range(instances)]
-        coroutines = [instance.upload() for instance in upload_instances]
+        dispatch_upload_instances(config, instances)
 
-        results = asyncio.run(
-            run_with_concurrency_limit(
-                coroutines,
-                settings.MAX_CONCURRENT_INSTANCES
-            )
+    except Exception as e:
+        logger.error(
+            f"Critical error uploading videos: {str(e)}",
+            exc_info=True
         )
+        raise
 
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Instance {i} failed: {result}", exc_info=result)
-            else:
-                logger.info(f"Instance {i} completed: {result}")
+@dramatiq.actor(
+    queue_name=settings.UPLOAD_QUEUE_NAME,
+    max_retries=settings.MAX_RETRIES,
+    priority=settings.PRIORITY
+)
+def run_upload_instance(config: dict, instance_number: int, batch_id: Optional[str] = None):
+    try:
+        with instance_slots:
+            logger.info(f"Uploading instance {instance_number}")
+            batch_tracker.update(batch_id, instance_number, "running")
+
+            result = run_async(UploadInstance(instance_number, config).upload())
+        if result.get("status") != "success":
+            raise RuntimeError(result.get("message"))
+
+        logger.info(f"Upload instance {instance_number} completed: {result}")
+        batch_tracker.update(batch_id, instance_number, "succeeded", result=result["message"])
 
     except Exception as e:
         logger.error(
-            f"Critical error uploading videos: {str(e)}",
+            f"Upload instance {instance_number} failed: {str(e)}",
             exc_info=True
         )
+        batch_tracker.failed(batch_id, instance_number, e, settings.MAX_RETRIES)
         raise